@@ -13,11 +13,17 @@ from weaviate.util import generate_uuid5
 from tqdm import tqdm
 import os
 import json
+import asyncio
+from async_queries import fan_out
+from client_factory import close_async_clients, get_async_client
+from dataset_cache import fetch_json
+from batching import BatchConfig
+from checkpoint import has_checkpoint
+from movie_loader import load_movies
 
 # Grab the movie data.
 data_url = "https://raw.githubusercontent.com/weaviate-tutorials/edu-datasets/main/movies_data_1990_2024.json"
-resp = requests.get(data_url)
-df = pd.DataFrame(resp.json())
+df = pd.DataFrame(fetch_json(data_url))  # Cached locally; revalidated with the server
 
 headers = {
     "X-OpenAI-Api-Key": os.getenv("OPENAI_API_KEY")
@@ -37,156 +43,180 @@ try:
     metainfo = client.get_meta()
     print(json.dumps(metainfo, indent=2))
 
+    # Set WEAVIATE_INCREMENTAL=1 to keep the collection and only sync the movies that changed
+    incremental = os.getenv("WEAVIATE_INCREMENTAL") == "1"
+    # If an earlier import was interrupted, continue it instead of starting over
+    resume = has_checkpoint("Movie") and client.collections.exists("Movie")
+
     # Create a movie collection.
-    if client.collections.exists("Movie"):
+    if client.collections.exists("Movie") and not (incremental or resume):
         print("Deleting existing Movie collection.")
         client.collections.delete("Movie")
 
-    client.collections.create(
-    name="Movie",
-    properties=[
-        wc.Property(name="title", data_type=wc.DataType.TEXT),
-        wc.Property(name="overview", data_type=wc.DataType.TEXT),
-        wc.Property(name="vote_average", data_type=wc.DataType.NUMBER),
-        wc.Property(name="genre_ids", data_type=wc.DataType.INT_ARRAY),
-        wc.Property(name="release_date", data_type=wc.DataType.DATE),
-        wc.Property(name="tmdb_id", data_type=wc.DataType.INT),
-    ],
-    # Define the vectorizer module
-    vectorizer_config=wc.Configure.Vectorizer.text2vec_openai(),
-    # Define the generative module
-    generative_config=wc.Configure.Generative.openai()
-    )
+    if not client.collections.exists("Movie"):
+        client.collections.create(
+        name="Movie",
+        properties=[
+            wc.Property(name="title", data_type=wc.DataType.TEXT),
+            wc.Property(name="overview", data_type=wc.DataType.TEXT),
+            wc.Property(name="vote_average", data_type=wc.DataType.NUMBER),
+            wc.Property(name="genre_ids", data_type=wc.DataType.INT_ARRAY),
+            wc.Property(name="release_date", data_type=wc.DataType.DATE),
+            wc.Property(name="tmdb_id", data_type=wc.DataType.INT),
+        ],
+        # Define the vectorizer module
+        vectorizer_config=wc.Configure.Vectorizer.text2vec_openai(),
+        # Define the generative module
+        generative_config=wc.Configure.Generative.openai()
+        )
 
     # Get the collection
     movies = client.collections.get("Movie")
 
-    # Enter context manager
-    with movies.batch.fixed_size(batch_size=200) as batch:
-        # Loop through the data
-        for i, movie in tqdm(df.iterrows()):
-            # Convert data types
-            # Convert a JSON date to `datetime` and add time zone information
-            release_date = datetime.strptime(movie["release_date"], "%Y-%m-%d").replace(
-                tzinfo=timezone.utc
-            )
-            # Convert a JSON array to a list of integers
-            genre_ids = json.loads(movie["genre_ids"])
-
-            # Build the object payload
-            movie_obj = {
-                "title": movie["title"],
-                "overview": movie["overview"],
-                "vote_average": movie["vote_average"],
-                "genre_ids": genre_ids,
-                "release_date": release_date,
-                "tmdb_id": movie["id"],
-            }
-
-            # Add object to batch queue
-            batch.add_object(
-                properties=movie_obj,
-                uuid=generate_uuid5(movie["id"])
-                # references=reference_obj  # You can add references here
-            )
-            # Batcher automatically sends batches
+    # Transform and import the data (set WEAVIATE_LOADER_WORKERS to load in parallel)
+    report = load_movies(
+        "Movie",
+        df,
+        headers=headers,
+        incremental=incremental,
+        resume=resume,
+        batching=BatchConfig(batch_size=200),
+    )
 
     # Check for failed objects
-    if len(movies.batch.failed_objects) > 0:
-        print(f"Failed to import {len(movies.batch.failed_objects)} objects")
-    else:
-        print(f'{movies.batch.failed_objects = }')
+    report.print_summary()
+
+    # Run the independent queries below concurrently on the async client, so this
+    # takes about as long as the slowest query rather than the sum of all of them.
+    # A query that fails (e.g. a generative one without an LLM API key) comes back as
+    # its exception and is printed as such; the other results are still shown.
+    async def run_queries():
+        async_client = await get_async_client(headers)
+        amovies = async_client.collections.get("Movie")
+        try:
+            return await fan_out(
+                {
+                    "near_text": lambda: amovies.query.near_text(
+                        query="dystopian future", limit=5, return_metadata=wq.MetadataQuery(distance=True)
+                    ),
+                    "bm25": lambda: amovies.query.bm25(
+                        query="history", limit=5, return_metadata=wq.MetadataQuery(score=True)
+                    ),
+                    "hybrid": lambda: amovies.query.hybrid(
+                        query="history", limit=5, return_metadata=wq.MetadataQuery(score=True)
+                    ),
+                    "filtered": lambda: amovies.query.near_text(
+                        query="dystopian future",
+                        limit=5,
+                        return_metadata=wq.MetadataQuery(distance=True),
+                        filters=wq.Filter.by_property("release_date").greater_than(datetime(2020, 1, 1)),
+                    ),
+                    "single_prompt": lambda: amovies.generate.near_text(
+                        query="dystopian future",
+                        limit=5,
+                        single_prompt="Translate this into French: {title}",
+                    ),
+                    "grouped_task": lambda: amovies.generate.near_text(
+                        query="dystopian future",
+                        limit=5,
+                        grouped_task="What do these movies have in common?",
+                        # grouped_properties=["title", "overview"]  # Optional parameter; for reducing prompt length
+                    ),
+                },
+                timeout=60.0,  # Per-query timeout; the generative queries are the slowest
+            )
+        finally:
+            await close_async_clients()
+
+    results = asyncio.run(run_queries())
 
     # Perform query
     print("Query = dystopian future")
-    response = movies.query.near_text(
-        query="dystopian future", limit=5, return_metadata=wq.MetadataQuery(distance=True)
-    )
+    response = results["near_text"]
 
-    # Inspect the response
-    for o in response.objects:
-        print(
-            o.properties["title"], o.properties["release_date"].year
-        )  # Print the title and release year (note the release date is a datetime object)
-        print(
-            f"Distance to query: {o.metadata.distance:.3f}\n"
-        )  # Print the distance of the object from the query
+    if isinstance(response, BaseException):
+        print(f"Query failed ({type(response).__name__}): {response}\n")
+    else:
+        # Inspect the response
+        for o in response.objects:
+            print(
+                o.properties["title"], o.properties["release_date"].year
+            )  # Print the title and release year (note the release date is a datetime object)
+            print(
+                f"Distance to query: {o.metadata.distance:.3f}\n"
+            )  # Print the distance of the object from the query
 
     # Perform query
     print("BM25 query for history")
-    response = movies.query.bm25(
-        query="history", limit=5, return_metadata=wq.MetadataQuery(score=True)
-    )
+    response = results["bm25"]
 
-    # Inspect the response
-    for o in response.objects:
-        print(
-            o.properties["title"], o.properties["release_date"].year
-        )  # Print the title and release year (note the release date is a datetime object)
-        print(
-            f"BM25 score: {o.metadata.score:.3f}\n"
-        )  # Print the BM25 score of the object from the query
+    if isinstance(response, BaseException):
+        print(f"Query failed ({type(response).__name__}): {response}\n")
+    else:
+        # Inspect the response
+        for o in response.objects:
+            print(
+                o.properties["title"], o.properties["release_date"].year
+            )  # Print the title and release year (note the release date is a datetime object)
+            print(
+                f"BM25 score: {o.metadata.score:.3f}\n"
+            )  # Print the BM25 score of the object from the query
 
     # Hybrid Query
     print("Hybrid Query")
-    response = movies.query.hybrid(
-        query="history", limit=5, return_metadata=wq.MetadataQuery(score=True)
-    )
+    response = results["hybrid"]
 
-    # Inspect the response
-    for o in response.objects:
-        print(
-            o.properties["title"], o.properties["release_date"].year
-        )  # Print the title and release year (note the release date is a datetime object)
-        print(
-            f"Hybrid score: {o.metadata.score:.3f}\n"
-        )  # Print the hybrid search score of the object from the query
+    if isinstance(response, BaseException):
+        print(f"Query failed ({type(response).__name__}): {response}\n")
+    else:
+        # Inspect the response
+        for o in response.objects:
+            print(
+                o.properties["title"], o.properties["release_date"].year
+            )  # Print the title and release year (note the release date is a datetime object)
+            print(
+                f"Hybrid score: {o.metadata.score:.3f}\n"
+            )  # Print the hybrid search score of the object from the query
 
     # Perform query
     print("Query using release_date filter")
-    response = movies.query.near_text(
-        query="dystopian future",
-        limit=5,
-        return_metadata=wq.MetadataQuery(distance=True),
-        filters=wq.Filter.by_property("release_date").greater_than(datetime(2020, 1, 1))
-    )
+    response = results["filtered"]
 
-    # Inspect the response
-    for o in response.objects:
-        print(
-            o.properties["title"], o.properties["release_date"].year
-        )  # Print the title and release year (note the release date is a datetime object)
-        print(
-            f"Distance to query: {o.metadata.distance:.3f}\n"
-        )  # Print the distance of the object from the query
+    if isinstance(response, BaseException):
+        print(f"Query failed ({type(response).__name__}): {response}\n")
+    else:
+        # Inspect the response
+        for o in response.objects:
+            print(
+                o.properties["title"], o.properties["release_date"].year
+            )  # Print the title and release year (note the release date is a datetime object)
+            print(
+                f"Distance to query: {o.metadata.distance:.3f}\n"
+            )  # Print the distance of the object from the query
 
     # Single Prompt
     print("Single prompt query: Translate this into French")
+    response = results["single_prompt"]
 
-    response = movies.generate.near_text(
-        query="dystopian future",
-        limit=5,
-        single_prompt="Translate this into French: {title}"
-    )
-
-    # Inspect the response
-    for o in response.objects:
-        print(o.properties["title"])  # Print the title
-        print(o.generated)  # Print the generated text (the title, in French)
+    if isinstance(response, BaseException):
+        print(f"Query failed ({type(response).__name__}): {response}\n")
+    else:
+        # Inspect the response
+        for o in response.objects:
+            print(o.properties["title"])  # Print the title
+            print(o.generated)  # Print the generated text (the title, in French)
 
     # Generative Search
     print("Grouped task prompt query: What do these movies have in common?")
-    response = movies.generate.near_text(
-        query="dystopian future",
-        limit=5,
-        grouped_task="What do these movies have in common?",
-        # grouped_properties=["title", "overview"]  # Optional parameter; for reducing prompt length
-    )
+    response = results["grouped_task"]
 
-    # Inspect the response
-    for o in response.objects:
-        print(o.properties["title"])  # Print the title
-    print(response.generated)  # Print the generated text (the commonalities between them)
+    if isinstance(response, BaseException):
+        print(f"Query failed ({type(response).__name__}): {response}\n")
+    else:
+        # Inspect the response
+        for o in response.objects:
+            print(o.properties["title"])  # Print the title
+        print(response.generated)  # Print the generated text (the commonalities between them)
 
 
 
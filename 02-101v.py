@@ -13,9 +13,20 @@ from weaviate.util import generate_uuid5
 from tqdm import tqdm
 import os
 import json
+import asyncio
+from async_queries import fan_out
+from client_factory import close_async_clients, get_async_client
+from dataset_cache import fetch_json
 import cohere
 from cohere import Client as CohereClient
-from typing import List
+from typing import List, Optional, Sequence
+from functools import partial
+from embedding_cache import EmbeddingCache
+from embedding_pipeline import EmbeddingPipeline
+from embedding_store import save_embeddings
+from batching import BatchConfig
+from checkpoint import has_checkpoint
+from movie_loader import load_movies
 
 # Grab the movie data.
 # data_url = "https://raw.githubusercontent.com/weaviate-tutorials/edu-datasets/main/movies_data_1990_2024.json"
@@ -45,47 +56,48 @@ client = weaviate.connect_to_local(
     headers=headers,
 )
 
+# Embeddings are cached locally, so unchanged texts are never sent to Cohere twice
+emb_model = "embed-multilingual-v3.0"
+emb_cache = EmbeddingCache()
+
 # Define a function to call the endpoint and obtain embeddings
-def vectorize(cohere_client: CohereClient, texts: List[str]) -> List[List[float]]:
+def vectorize(
+    cohere_client: CohereClient,
+    texts: List[str],
+    input_type: str = "search_document",
+    cache: Optional[EmbeddingCache] = emb_cache,
+) -> Sequence[Sequence[float]]:
+    # Consult the cache first; only the misses are embedded by Cohere
+    if cache is not None:
+        return cache.get_or_embed(
+            emb_model, input_type, texts, partial(vectorize, cohere_client, input_type=input_type, cache=None)
+        )
 
     response = cohere_client.embed(
-        texts=texts, model="embed-multilingual-v3.0", input_type="search_document"
+        texts=texts, model=emb_model, input_type=input_type
     )
 
     return response.embeddings
 
 # Get the source data
 data_url = "https://raw.githubusercontent.com/weaviate-tutorials/edu-datasets/main/movies_data_1990_2024.json"
-resp = requests.get(data_url)
-df = pd.DataFrame(resp.json())
-
-# Loop through the dataset to generate vectors in batches
-emb_dfs = list()
-src_texts = list()
-for i, row in enumerate(df.itertuples(index=False)):
-    # Concatenate text to create a source string
-    src_text = "Title" + row.title + "; Overview: " + row.overview
-    # Add to the buffer
-    src_texts.append(src_text)
-    if (len(src_texts) == 50) or (i + 1 == len(df)):  # Get embeddings in batches of 50
-        # Get a batch of embeddings
-        output = vectorize(co, src_texts)
-        index = list(range(i - len(src_texts) + 1, i + 1))
-        emb_df = pd.DataFrame(output, index=index)
-        # Add the batch of embeddings to a list
-        emb_dfs.append(emb_df)
-        # Reset the buffer
-        src_texts = list()
-
-
-emb_df = pd.concat(emb_dfs)  # Create a combined dataset
-
-# Save the data as a CSV
-os.makedirs("scratch", exist_ok=True)  # Create a folder if it doesn't exist
-emb_df.to_csv(
-    f"scratch/movies_data_1990_2024_embeddings.csv",
-    index=False,
+df = pd.DataFrame(fetch_json(data_url))  # Cached locally; revalidated with the server
+
+# Concatenate text to create a source string for every movie
+src_texts = ("Title" + df["title"] + "; Overview: " + df["overview"]).tolist()
+
+# Generate vectors in batches, with several embedding requests in flight at once.
+# Texts already in the embedding cache are skipped, so an unchanged dataset makes no calls.
+# `output` is a float32 matrix with one row per movie, filled from the cache and the API.
+pipeline = EmbeddingPipeline(max_in_flight=4, batch_size=50)
+output = emb_cache.get_or_embed(
+    emb_model, "search_document", src_texts, partial(pipeline.run, partial(vectorize, co, cache=None))
 )
+print(f"Embedded {emb_cache.misses} texts in {pipeline.calls} calls ({pipeline.retries} retries)")
+print(emb_cache.stats())
+
+# Save the data as a float32 matrix plus an index of tmdb ids (creates the folder if needed)
+save_embeddings("scratch/movies_data_1990_2024_embeddings.npy", df["id"], output)
 
 # Check Weaviate status
 try:
@@ -95,173 +107,194 @@ try:
     metainfo = client.get_meta()
     print(json.dumps(metainfo, indent=2))
 
+    # Set WEAVIATE_INCREMENTAL=1 to keep the collection and only sync the movies that changed
+    incremental = os.getenv("WEAVIATE_INCREMENTAL") == "1"
+    # If an earlier import was interrupted, continue it instead of starting over
+    resume = has_checkpoint("MovieCustomVector") and client.collections.exists("MovieCustomVector")
+
     # Create a movie collection.
-    if client.collections.exists("MovieCustomVector"):
+    if client.collections.exists("MovieCustomVector") and not (incremental or resume):
         print("Deleting existing MovieCustomVector collection.")
         client.collections.delete("MovieCustomVector")
 
-    client.collections.create(
-    name="MovieCustomVector",
-    properties=[
-        wc.Property(name="title", data_type=wc.DataType.TEXT),
-        wc.Property(name="overview", data_type=wc.DataType.TEXT),
-        wc.Property(name="vote_average", data_type=wc.DataType.NUMBER),
-        wc.Property(name="genre_ids", data_type=wc.DataType.INT_ARRAY),
-        wc.Property(name="release_date", data_type=wc.DataType.DATE),
-        wc.Property(name="tmdb_id", data_type=wc.DataType.INT),
-    ],
-    # Define the vectorizer module
-    vectorizer_config=wc.Configure.Vectorizer.none(),
-    # Define the generative module
-    generative_config=wc.Configure.Generative.cohere()
-    )
+    if not client.collections.exists("MovieCustomVector"):
+        client.collections.create(
+        name="MovieCustomVector",
+        properties=[
+            wc.Property(name="title", data_type=wc.DataType.TEXT),
+            wc.Property(name="overview", data_type=wc.DataType.TEXT),
+            wc.Property(name="vote_average", data_type=wc.DataType.NUMBER),
+            wc.Property(name="genre_ids", data_type=wc.DataType.INT_ARRAY),
+            wc.Property(name="release_date", data_type=wc.DataType.DATE),
+            wc.Property(name="tmdb_id", data_type=wc.DataType.INT),
+        ],
+        # Define the vectorizer module
+        vectorizer_config=wc.Configure.Vectorizer.none(),
+        # Define the generative module
+        generative_config=wc.Configure.Generative.cohere()
+        )
 
 
     # Load the embeddings (embeddings from the previous step)
-    # embs_path = "https://raw.githubusercontent.com/weaviate-tutorials/edu-datasets/main/movies_data_1990_2024_embeddings.csv"
-    # Or load embeddings from a local file (if you generated them earlier)
-    embs_path = "scratch/movies_data_1990_2024_embeddings.csv"
-
-    emb_df = pd.read_csv(embs_path)
+    # The matrix is memory-mapped, so loading is instant and rows are not copied
+    embs_path = "scratch/movies_data_1990_2024_embeddings.npy"
 
     # Get the collection
     movies = client.collections.get("MovieCustomVector")
 
-    # Enter context manager
-    with movies.batch.fixed_size(batch_size=200) as batch:
-        # Loop through the data
-        for i, movie in enumerate(df.itertuples(index=False)):
-            # Convert data types
-            # Convert a JSON date to `datetime` and add time zone information
-            release_date = datetime.strptime(movie.release_date, "%Y-%m-%d").replace(
-                tzinfo=timezone.utc
-            )
-            # Convert a JSON array to a list of integers
-            genre_ids = json.loads(movie.genre_ids)
-
-            # Build the object payload
-            movie_obj = {
-                "title": movie.title,
-                "overview": movie.overview,
-                "vote_average": movie.vote_average,
-                "genre_ids": genre_ids,
-                "release_date": release_date,
-                "tmdb_id": movie.id,
-            }
-
-            # Get the vector
-            vector = emb_df.iloc[i].to_list()
-
-            # Add object (including vector) to batch queue
-            batch.add_object(
-                properties=movie_obj,
-                uuid=generate_uuid5(movie.id),
-                vector=vector  # Add the custom vector
-                # references=reference_obj  # You can add references here
-            )
-            # Batcher automatically sends batches
-        
+    # Transform and import the data, including the custom vectors
+    # (set WEAVIATE_LOADER_WORKERS to load in parallel)
+    report = load_movies(
+        "MovieCustomVector",
+        df,
+        headers=headers,
+        incremental=incremental,
+        resume=resume,
+        vectors_path=embs_path,
+        batching=BatchConfig(batch_size=200),
+    )
+
     # Check for failed objects
-    if len(movies.batch.failed_objects) > 0:
-        print(f"Failed to import {len(movies.batch.failed_objects)} objects")
-    else:
-        print(f'{movies.batch.failed_objects = }')
+    report.print_summary()
 
     # Perform query
     query_text = "dystopian future"
-    query_vector = vectorize(co, [query_text])[0]  # Get the vector for the query text
+    query_vector = vectorize(co, [query_text])[0]  # Get the vector for the query text (cached after the first run)
+    print(emb_cache.stats())
+
+    # Run the independent queries below concurrently on the async client, so this
+    # takes about as long as the slowest query rather than the sum of all of them.
+    # A query that fails (e.g. a generative one without an LLM API key) comes back as
+    # its exception and is printed as such; the other results are still shown.
+    async def run_queries():
+        async_client = await get_async_client(headers)
+        amovies = async_client.collections.get("MovieCustomVector")
+        try:
+            return await fan_out(
+                {
+                    "near_vector": lambda: amovies.query.near_vector(
+                        near_vector=query_vector,  # Use the custom vector for the query
+                        limit=5,
+                        return_metadata=wq.MetadataQuery(distance=True),
+                    ),
+                    "bm25": lambda: amovies.query.bm25(
+                        query="history", limit=5, return_metadata=wq.MetadataQuery(score=True)
+                    ),
+                    "hybrid": lambda: amovies.query.hybrid(
+                        query="history", limit=5, return_metadata=wq.MetadataQuery(score=True),
+                        vector=query_vector,  # Use the custom vector for the query
+                    ),
+                    "filtered": lambda: amovies.query.near_vector(
+                        near_vector=query_vector,
+                        limit=5,
+                        return_metadata=wq.MetadataQuery(distance=True),
+                        filters=wq.Filter.by_property("release_date").greater_than(datetime(2020, 1, 1)),
+                    ),
+                    "single_prompt": lambda: amovies.generate.near_vector(
+                        near_vector=query_vector,
+                        limit=5,
+                        single_prompt="Translate this into French: {title}",
+                    ),
+                    "grouped_task": lambda: amovies.generate.near_vector(
+                        near_vector=query_vector,
+                        limit=5,
+                        grouped_task="What do these movies have in common?",
+                        # grouped_properties=["title", "overview"]  # Optional parameter; for reducing prompt length
+                    ),
+                },
+                timeout=60.0,  # Per-query timeout; the generative queries are the slowest
+            )
+        finally:
+            await close_async_clients()
+
+    results = asyncio.run(run_queries())
+
     print(f"{query_text = }")
-    response = movies.query.near_vector(
-        limit=5, 
-        return_metadata=wq.MetadataQuery(distance=True),
-        near_vector=query_vector  # Use the custom vector for the query
-    )
+    response = results["near_vector"]
 
-    # Inspect the response
-    for o in response.objects:
-        print(
-            o.properties["title"], o.properties["release_date"].year
-        )  # Print the title and release year (note the release date is a datetime object)
-        print(
-            f"Distance to query: {o.metadata.distance:.3f}\n"
-        )  # Print the distance of the object from the query
+    if isinstance(response, BaseException):
+        print(f"Query failed ({type(response).__name__}): {response}\n")
+    else:
+        # Inspect the response
+        for o in response.objects:
+            print(
+                o.properties["title"], o.properties["release_date"].year
+            )  # Print the title and release year (note the release date is a datetime object)
+            print(
+                f"Distance to query: {o.metadata.distance:.3f}\n"
+            )  # Print the distance of the object from the query
 
     # Perform query
     print("BM25 query for history")
-    response = movies.query.bm25(
-        query="history", limit=5, return_metadata=wq.MetadataQuery(score=True)
-    )
+    response = results["bm25"]
 
-    # Inspect the response
-    for o in response.objects:
-        print(
-            o.properties["title"], o.properties["release_date"].year
-        )  # Print the title and release year (note the release date is a datetime object)
-        print(
-            f"BM25 score: {o.metadata.score:.3f}\n"
-        )  # Print the BM25 score of the object from the query
+    if isinstance(response, BaseException):
+        print(f"Query failed ({type(response).__name__}): {response}\n")
+    else:
+        # Inspect the response
+        for o in response.objects:
+            print(
+                o.properties["title"], o.properties["release_date"].year
+            )  # Print the title and release year (note the release date is a datetime object)
+            print(
+                f"BM25 score: {o.metadata.score:.3f}\n"
+            )  # Print the BM25 score of the object from the query
 
     # Hybrid Query
     print("Hybrid Query")
-    response = movies.query.hybrid(
-        query="history", limit=5, return_metadata=wq.MetadataQuery(score=True),
-        vector=query_vector  # Use the custom vector for the query
-    )
+    response = results["hybrid"]
 
-    # Inspect the response
-    for o in response.objects:
-        print(
-            o.properties["title"], o.properties["release_date"].year
-        )  # Print the title and release year (note the release date is a datetime object)
-        print(
-            f"Hybrid score: {o.metadata.score:.3f}\n"
-        )  # Print the hybrid search score of the object from the query
+    if isinstance(response, BaseException):
+        print(f"Query failed ({type(response).__name__}): {response}\n")
+    else:
+        # Inspect the response
+        for o in response.objects:
+            print(
+                o.properties["title"], o.properties["release_date"].year
+            )  # Print the title and release year (note the release date is a datetime object)
+            print(
+                f"Hybrid score: {o.metadata.score:.3f}\n"
+            )  # Print the hybrid search score of the object from the query
 
     # Perform query
     print("Query using release_date filter")
-    response = movies.query.near_vector(
-        near_vector=query_vector,  # Use the custom vector for the query
-        limit=5,
-        return_metadata=wq.MetadataQuery(distance=True),
-        filters=wq.Filter.by_property("release_date").greater_than(datetime(2020, 1, 1))
-    )
+    response = results["filtered"]
 
-    # Inspect the response
-    for o in response.objects:
-        print(
-            o.properties["title"], o.properties["release_date"].year
-        )  # Print the title and release year (note the release date is a datetime object)
-        print(
-            f"Distance to query: {o.metadata.distance:.3f}\n"
-        )  # Print the distance of the object from the query
+    if isinstance(response, BaseException):
+        print(f"Query failed ({type(response).__name__}): {response}\n")
+    else:
+        # Inspect the response
+        for o in response.objects:
+            print(
+                o.properties["title"], o.properties["release_date"].year
+            )  # Print the title and release year (note the release date is a datetime object)
+            print(
+                f"Distance to query: {o.metadata.distance:.3f}\n"
+            )  # Print the distance of the object from the query
 
     # Single Prompt
     print("Single prompt query: Translate this into French")
+    response = results["single_prompt"]
 
-    response = movies.generate.near_vector(
-        near_vector=query_vector,  # Use the custom vector for the query
-        limit=5,
-        single_prompt="Translate this into French: {title}"
-    )
-
-    # Inspect the response
-    for o in response.objects:
-        print(o.properties["title"])  # Print the title
-        print(o.generated)  # Print the generated text (the title, in French)
+    if isinstance(response, BaseException):
+        print(f"Query failed ({type(response).__name__}): {response}\n")
+    else:
+        # Inspect the response
+        for o in response.objects:
+            print(o.properties["title"])  # Print the title
+            print(o.generated)  # Print the generated text (the title, in French)
 
     # Generative Search
     print("Grouped task prompt query: What do these movies have in common?")
-    response = movies.generate.near_vector(
-        near_vector=query_vector,  # Use the custom vector for the query
-        limit=5,
-        grouped_task="What do these movies have in common?",
-        # grouped_properties=["title", "overview"]  # Optional parameter; for reducing prompt length
-    )
+    response = results["grouped_task"]
 
-    # Inspect the response
-    for o in response.objects:
-        print(o.properties["title"])  # Print the title
-    print(response.generated)  # Print the generated text (the commonalities between them)
+    if isinstance(response, BaseException):
+        print(f"Query failed ({type(response).__name__}): {response}\n")
+    else:
+        # Inspect the response
+        for o in response.objects:
+            print(o.properties["title"])  # Print the title
+        print(response.generated)  # Print the generated text (the commonalities between them)
 
 
 
@@ -1,4 +1,7 @@
 import weaviate
+from client_factory import close_clients, get_client
+from instrumentation import instrumented
+from query_cache import cached
 import weaviate.classes.query as wq
 import os
 
@@ -10,14 +13,16 @@ headers = {
     "X-OpenAI-Api-Key": os.getenv("OPENAI_API_KEY")
 }
 
-client = weaviate.connect_to_local()
+client = get_client()  # Shared, warm connection
 
 # Check Weaviate status
 try:
     assert client.is_live()
 
     # Get the collection
-    movies = client.collections.get("MovieMM")
+    # Repeated queries are answered from the client-side result cache
+    # Every query is timed when WEAVIATE_INSTRUMENT=1 (see instrumentation.py)
+    movies = instrumented(cached(client.collections.get("MovieMM")))
 
     # Perform a text query
     response = movies.query.near_text(
@@ -37,4 +42,4 @@ try:
         )  # Print the distance of the object from the query
 
 finally:
-    client.close()
\ No newline at end of file
+    close_clients()
\ No newline at end of file
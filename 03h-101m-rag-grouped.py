@@ -1,16 +1,11 @@
 import weaviate
+from client_factory import close_clients, get_client
+from instrumentation import instrumented
+from image_query import url_to_base64
 import weaviate.classes.query as wq
 import os
 from datetime import datetime
 
-def url_to_base64(url):
-    import requests
-    import base64
-
-    image_response = requests.get(url)
-    content = image_response.content
-    return base64.b64encode(content).decode("utf-8")
-
 # 
 # Connect to Weaviate
 #
@@ -18,16 +13,17 @@ headers = {
     "X-OpenAI-Api-Key": os.getenv("OPENAI_API_KEY")
 }
 
-client = weaviate.connect_to_local(headers=headers)
+client = get_client(headers)  # Shared, warm connection
 
 # Check Weaviate status
 try:
     # Get the collection
-    movies = client.collections.get("MovieMM")
+    # Every query is timed when WEAVIATE_INSTRUMENT=1 (see instrumentation.py)
+    movies = instrumented(client.collections.get("MovieMM"))
 
     # Perform query
     src_img_path = "https://github.com/weaviate-tutorials/edu-datasets/blob/main/img/International_Space_Station_after_undocking_of_STS-132.jpg?raw=true"
-    query_b64 = url_to_base64(src_img_path)
+    query_b64 = url_to_base64(src_img_path)  # Downsized to the CLIP resolution and cached
 
     response = movies.generate.near_image(
         near_image=query_b64,
@@ -42,4 +38,4 @@ try:
     print(response.generated)  # Print the generated text (the commonalities between them)
 
 finally:
-    client.close()
\ No newline at end of file
+    close_clients()
\ No newline at end of file
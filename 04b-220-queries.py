@@ -1,14 +1,22 @@
 import weaviate
+from client_factory import close_clients, get_client
+from instrumentation import instrumented
+from multi_target import combine
+from query_cache import cached
+from query_vectors import vectorized
 import weaviate.classes.query as wq
 import os
 
 
 # Instantiate your client (not shown). e.g.:
 headers = {"X-OpenAI-Api-Key": os.getenv("OPENAI_API_KEY")}  # Replace with your OpenAI API key
-client = weaviate.connect_to_local(headers=headers)
+client = get_client(headers)  # Shared, warm connection
 
 # Get the collection
-movies = client.collections.get("MovieNVDemo")
+# Repeated queries are answered from the client-side result cache, and query texts
+# whose vectors are cached locally are sent as vector searches (see query_vectors.py)
+# Every query is timed when WEAVIATE_INSTRUMENT=1 (see instrumentation.py)
+movies = instrumented(cached(vectorized(client.collections.get("MovieNVDemo"), headers)))
 
 # Perform a text query
 response = movies.query.near_text(
@@ -28,6 +36,25 @@ for o in response.objects:
         f"Distance to query: {o.metadata.distance:.3f}\n"
     )  # Print the distance of the object from the query
 
+# Multi-target text query: search the title and overview vectors in one call;
+# Weaviate merges the candidates and combines the distances (see multi_target.py)
+response = movies.query.near_text(
+    query="A joyful holiday film",
+    target_vector=combine({"title": 0.6, "overview": 0.4}, "sum"),  # Weighted sum of distances
+    limit=5,
+    return_metadata=wq.MetadataQuery(distance=True),
+    return_properties=["title", "release_date", "tmdb_id"]
+)
+
+# Inspect the response
+for o in response.objects:
+    print(
+        o.properties["title"], o.properties["release_date"].year, o.properties["tmdb_id"]
+    )  # Print the title and release year (note the release date is a datetime object)
+    print(
+        f"Combined distance to query: {o.metadata.distance:.3f}\n"
+    )  # Print the combined distance of the object from the query
+
 # Hybrid query example
 response = movies.query.hybrid(
     query="history",
@@ -45,4 +72,4 @@ for o in response.objects:
         f"Hybrid score: {o.metadata.score:.3f}\n"
     )  # Print the hybrid search score of the object from the query
     
-client.close()
\ No newline at end of file
+close_clients()
\ No newline at end of file
@@ -1,27 +1,22 @@
 import os
 import weaviate
+from client_factory import close_clients, get_client
+from instrumentation import instrumented
+from image_query import url_to_base64
 import os
 
 # Instantiate your client (not shown). e.g.:
 headers = {"X-OpenAI-Api-Key": os.getenv("OPENAI_API_KEY")}  # Replace with your OpenAI API key
-client = weaviate.connect_to_local(headers=headers)
-
-
-def url_to_base64(url):
-    import requests
-    import base64
-
-    image_response = requests.get(url)
-    content = image_response.content
-    return base64.b64encode(content).decode("utf-8")
+client = get_client(headers)  # Shared, warm connection
 
 
 # Get the collection
-movies = client.collections.get("MovieNVDemo")
+# Every query is timed when WEAVIATE_INSTRUMENT=1 (see instrumentation.py)
+movies = instrumented(client.collections.get("MovieNVDemo"))
 
 # Perform query
 src_img_path = "https://raw.githubusercontent.com/weaviate-tutorials/edu-datasets/main/img/1927_Boris_Bilinski_(1900-1948)_Plakat_f%C3%BCr_den_Film_Metropolis%2C_Staatliche_Museen_zu_Berlin.jpg"
-query_b64 = url_to_base64(src_img_path)
+query_b64 = url_to_base64(src_img_path)  # Downsized to the CLIP resolution and cached
 
 # response = movies.generate.near_text(
 #     query="Science fiction film set in space",
@@ -38,4 +33,4 @@ for o in response.objects:
     print(o.properties["title"])  # Print the title
 print(response.generated)  # Print the generated text (the commonalities between them)
 
-client.close()
\ No newline at end of file
+close_clients()
\ No newline at end of file
@@ -0,0 +1,55 @@
+#
+# Weaviate Academy
+# Run independent queries concurrently on the async Weaviate client
+#
+# `fan_out` takes named zero-argument coroutine factories, e.g.
+#
+#   {"bm25": lambda: movies.query.bm25(query="history", limit=5), ...}
+#
+# starts them all at once and gathers the results, so a page that needs several
+# retrieval modes waits for the slowest query instead of the sum of all of them.
+# Each query has its own timeout; a query that fails, times out or is cancelled yields
+# its exception (a `CancelledError` instance for a cancelled one) in place of a result.
+# With `fail_fast=True` the first failure cancels the others and is raised. Cancelling
+# the caller cancels every query still in flight; either way fan_out only returns once
+# the cancelled queries have finished. Each query is timed as a `query.<name>` stage
+# when instrumentation is enabled (see instrumentation.py).
+#
+import asyncio
+from typing import Any, Awaitable, Callable, Dict
+
+from instrumentation import stage
+
+
+QueryFactory = Callable[[], Awaitable[Any]]
+
+
+async def _timed(name: str, query: QueryFactory) -> Any:
+    with stage(f"query.{name}"):
+        return await query()
+
+
+def _outcome(task: asyncio.Task) -> Any:
+    # A cancelled task has neither a result nor an exception; report it as cancelled
+    if task.cancelled():
+        return asyncio.CancelledError()
+    return task.exception() if task.exception() is not None else task.result()
+
+
+async def fan_out(
+    queries: Dict[str, QueryFactory], timeout: float = 30.0, fail_fast: bool = False
+) -> Dict[str, Any]:
+    tasks = {
+        name: asyncio.create_task(asyncio.wait_for(_timed(name, query), timeout), name=name)
+        for name, query in queries.items()
+    }
+    try:
+        await asyncio.gather(*tasks.values(), return_exceptions=not fail_fast)
+    finally:
+        # On cancellation or a fail-fast error, do not leave queries running
+        pending = [task for task in tasks.values() if not task.done()]
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.wait(pending)
+    return {name: _outcome(task) for name, task in tasks.items()}
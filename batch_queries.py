@@ -0,0 +1,118 @@
+#
+# Weaviate Academy
+# Run many near_text / near_vector queries in one call
+#
+# `batch_query(collection, queries)` takes a list of query texts and/or precomputed
+# query vectors (as in 02-101v.py) and runs them over the shared gRPC connection with at
+# most `concurrency` requests in flight, yielding the responses in input order as they
+# become available. With `embed_fn`, all query texts are embedded up front in one
+# batched call (deduplicated), and every query is sent as near_vector. For collections
+# using text2vec-openai, `collection_embedder` builds such an `embed_fn` from the
+# collection's own model settings, with the vectors kept in the EmbeddingCache:
+#
+#   embed = collection_embedder(movies)
+#   for response in batch_query(movies, eval_queries, embed_fn=embed, limit=10):
+#       ...
+#
+import argparse
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterator, List, Optional, Sequence, Union
+
+from client_factory import close_clients, get_client
+from concurrency import ordered_map
+from embedding_cache import EmbeddingCache
+from query_vectors import INPUT_TYPE, cache_model_name, openai_embed, openai_settings
+
+
+Query = Union[str, Sequence[float]]
+EmbedFn = Callable[[List[str]], List[List[float]]]
+
+
+def collection_embedder(
+    collection,
+    target_vector: Optional[str] = None,
+    api_key: Optional[str] = None,
+    cache: Optional[EmbeddingCache] = None,
+) -> EmbedFn:
+    # An `embed_fn` using the OpenAI model the collection (or named vector) is configured with
+    settings = openai_settings(collection, target_vector)
+    if settings is None:
+        raise ValueError(f"{collection.name} ({target_vector or 'default vector'}) does not use text2vec-openai")
+    api_key = api_key or os.getenv("OPENAI_API_KEY")
+    cache = cache if cache is not None else EmbeddingCache()
+    cache_model = cache_model_name(settings)
+
+    def embed(texts: List[str]) -> Sequence[Sequence[float]]:
+        return cache.get_or_embed(
+            cache_model,
+            INPUT_TYPE,
+            texts,
+            lambda misses: openai_embed(
+                misses, settings["model"], api_key, settings["dimensions"], settings["base_url"]
+            ),
+        )
+
+    return embed
+
+
+def batch_query(
+    collection,
+    queries: Sequence[Query],
+    embed_fn: Optional[EmbedFn] = None,
+    concurrency: int = 8,
+    return_exceptions: bool = False,
+    **query_kwargs,
+) -> Iterator:
+    # Yield one response per query, in order. `query_kwargs` (limit, filters,
+    # target_vector, return_metadata, ...) are passed to every query. With
+    # `return_exceptions=True` a failed query yields its exception instead of raising.
+    vectors = {}
+    if embed_fn is not None:
+        texts = list(dict.fromkeys(query for query in queries if isinstance(query, str)))
+        if texts:
+            vectors = dict(zip(texts, embed_fn(texts)))
+
+    def run(query: Query):
+        try:
+            if isinstance(query, str) and query not in vectors:
+                return collection.query.near_text(query=query, **query_kwargs)
+            vector = vectors[query] if isinstance(query, str) else query
+            return collection.query.near_vector(near_vector=list(vector), **query_kwargs)
+        except Exception as exc:
+            if return_exceptions:
+                return exc
+            raise
+
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="batch-query") as executor:
+        yield from ordered_map(executor, run, queries, max_pending=concurrency * 4)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the queries in a file (one per line) as a batch")
+    parser.add_argument("collection")
+    parser.add_argument("queries_file")
+    parser.add_argument("--limit", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--target-vector")
+    parser.add_argument("--embed", action="store_true", help="Embed the queries client-side first (text2vec-openai)")
+    args = parser.parse_args()
+
+    with open(args.queries_file) as file:
+        queries = [line.strip() for line in file if line.strip()]
+
+    client = get_client({"X-OpenAI-Api-Key": os.getenv("OPENAI_API_KEY")})
+    try:
+        movies = client.collections.get(args.collection)
+        embed_fn = collection_embedder(movies, args.target_vector) if args.embed else None
+        responses = batch_query(
+            movies, queries, embed_fn=embed_fn, concurrency=args.concurrency,
+            return_exceptions=True, limit=args.limit, target_vector=args.target_vector,
+        )
+        for query, response in zip(queries, responses):
+            if isinstance(response, Exception):
+                print(f"{query}: failed ({response})")
+            else:
+                print(f"{query}: " + "; ".join(str(o.properties.get("title")) for o in response.objects))
+    finally:
+        close_clients()
@@ -0,0 +1,230 @@
+#
+# Weaviate Academy
+# Adaptive batch writer for the shared loader
+#
+# Instead of a hardcoded `fixed_size(200)` / `fixed_size(50)`, `ObjectBatcher` sizes each
+# request from what it measures: a batch is sent once it reaches the current batch size
+# or `max_batch_bytes` of payload, whichever comes first, and the batch size is then
+# scaled towards `target_latency` seconds per request. Slow requests (large posters, a
+# vectorizer falling behind) shrink the batches; fast ones grow them.
+#
+# Failed requests are classified by exception type and HTTP / gRPC status, failed objects
+# by the status in their error message. Transient failures (timeouts, rate limits,
+# unavailable vectorizers) are re-submitted in follow-up batches with exponential
+# backoff; permanent failures, and transient ones that run out of retries, go to the
+# dead-letter queue (see dead_letter.py) when one is attached. Other exceptions (bad
+# properties, bugs) are not caught.
+#
+import re
+import time
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import grpc
+import httpx
+from weaviate.classes.data import DataObject
+from weaviate.exceptions import (
+    UnexpectedStatusCodeError,
+    WeaviateBaseError,
+    WeaviateConnectionError,
+    WeaviateGRPCUnavailableError,
+    WeaviateInsertManyAllFailedError,
+    WeaviateRetryError,
+    WeaviateTimeoutError,
+)
+
+from instrumentation import count, stage
+
+
+class BatchConfig(NamedTuple):
+    batch_size: int = 100  # Starting size, or the fixed size when `adaptive` is False
+    adaptive: bool = True
+    min_batch_size: int = 10
+    max_batch_size: int = 1000
+    max_batch_bytes: int = 8 * 1024 * 1024  # Cap on the estimated payload of one request
+    target_latency: float = 2.0  # Seconds per request the batch size is tuned towards
+    max_retries: int = 3  # Re-submissions of an object after a transient failure
+    retry_backoff: float = 1.0  # Seconds before the first retry; doubles on each attempt
+
+
+# Whole-request failures worth retrying, by exception type and status code
+TRANSIENT_EXCEPTIONS = (
+    WeaviateTimeoutError,
+    WeaviateConnectionError,
+    WeaviateGRPCUnavailableError,
+    WeaviateRetryError,
+    httpx.TransportError,
+    ConnectionError,
+    TimeoutError,
+)
+TRANSIENT_HTTP_STATUSES = {408, 429, 500, 502, 503, 504}
+TRANSIENT_GRPC_CODES = {
+    grpc.StatusCode.UNAVAILABLE,
+    grpc.StatusCode.DEADLINE_EXCEEDED,
+    grpc.StatusCode.RESOURCE_EXHAUSTED,
+    grpc.StatusCode.ABORTED,
+}
+# Errors a request can fail with; anything else is a bug and is raised
+REQUEST_ERRORS = (WeaviateBaseError, grpc.RpcError) + TRANSIENT_EXCEPTIONS
+
+# Per-object errors only come back as message strings. Match the status a module (e.g. a
+# vectorizer) reported and Go's context errors, not bare numbers that could be an id.
+TRANSIENT_MESSAGE = re.compile(
+    r"status(?: code)?:? ?(?:408|429|50[0234])\b|context deadline exceeded|context canceled"
+    r"|too many requests|rate limit(?:ed| exceeded)",
+    re.IGNORECASE,
+)
+ALL_FAILED_PREFIX = "Here is the set of all errors: "
+
+
+def is_transient_error(exc: BaseException) -> bool:
+    # Classify a failed request by the exception type, or the HTTP / gRPC status behind it
+    if isinstance(exc, TRANSIENT_EXCEPTIONS):
+        return True
+    if isinstance(exc, UnexpectedStatusCodeError):
+        grpc_codes = {code.value[0] for code in TRANSIENT_GRPC_CODES}
+        return exc.status_code in TRANSIENT_HTTP_STATUSES or exc.status_code in grpc_codes
+    if isinstance(exc, grpc.Call):
+        return exc.code() in TRANSIENT_GRPC_CODES
+    # The client re-raises gRPC errors as WeaviateBatchError; the original is chained
+    cause = exc.__cause__ or exc.__context__
+    return cause is not None and is_transient_error(cause)
+
+
+def is_transient_message(message: str) -> bool:
+    return TRANSIENT_MESSAGE.search(message) is not None
+
+
+def estimate_bytes(properties: Dict, vector=None) -> int:
+    # Rough size of an object on the wire; text and base64 BLOBs dominate
+    size = 0
+    for value in properties.values():
+        if isinstance(value, str):
+            size += len(value)
+        elif isinstance(value, (list, tuple)):
+            size += 8 * len(value)
+        else:
+            size += 8
+    if isinstance(vector, dict):
+        # Named vectors
+        size += sum(4 * len(named) for named in vector.values())
+    elif vector is not None:
+        size += 4 * len(vector)
+    return size
+
+
+class ObjectBatcher:
+    def __init__(self, collection, config: BatchConfig = BatchConfig(), journal=None, dead_letters=None):
+        self.collection = collection
+        self.config = config
+        # Optional `CheckpointJournal` that records every acknowledged batch
+        self.journal = journal
+        # Optional `DeadLetterQueue` for objects that could not be imported
+        self.dead_letters = dead_letters
+        self.batch_size = config.batch_size
+        self.imported = 0
+        self.retried = 0
+        self.failed: List[Dict] = []
+        self._objects: List[DataObject] = []
+        self._bytes = 0
+        # Objects waiting for a retry, as (due time, attempt, object)
+        self._retries: List[Tuple[float, int, DataObject]] = []
+
+    def __enter__(self) -> "ObjectBatcher":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.flush()
+        # Wait out the backoff of the remaining retries
+        while self._retries:
+            time.sleep(max(0.0, min(due for due, _, _ in self._retries) - time.monotonic()))
+            self._send_due_retries()
+
+    def add_object(self, properties: Dict, uuid: str, vector: Optional[List[float]] = None) -> None:
+        size = estimate_bytes(properties, vector)
+        # Send what we have first if this object would push the request over the byte cap
+        if self._objects and self._bytes + size > self.config.max_batch_bytes:
+            self.flush()
+        self._objects.append(DataObject(properties=properties, uuid=uuid, vector=vector))
+        self._bytes += size
+        count("payload_bytes", size)
+        if len(self._objects) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        self._send_due_retries()
+        if not self._objects:
+            return
+        objects, self._objects = self._objects, []
+        full_by_count = len(objects) >= self.batch_size
+        self._bytes = 0
+
+        elapsed = self._send(objects, [0] * len(objects))
+        # Batches cut short by the byte cap say nothing about whether larger ones would fit
+        if full_by_count and elapsed is not None:
+            self._adjust(elapsed)
+
+    def _send_due_retries(self) -> None:
+        now = time.monotonic()
+        due = [(attempt, obj) for due_at, attempt, obj in self._retries if due_at <= now]
+        if not due:
+            return
+        self._retries = [retry for retry in self._retries if retry[0] > now]
+        for start in range(0, len(due), self.batch_size):
+            chunk = due[start:start + self.batch_size]
+            self._send([obj for _, obj in chunk], [attempt for attempt, _ in chunk])
+
+    def _send(self, objects: List[DataObject], attempts: List[int]) -> Optional[float]:
+        # Send one request; returns its latency, or None if the whole request failed
+        start = time.perf_counter()
+        try:
+            # Includes server-side vectorization, which happens before the request returns
+            with stage("batch_send", objects=len(objects)):
+                result = self.collection.data.insert_many(objects)
+            errors = {
+                index: (error.message, is_transient_message(error.message))
+                for index, error in result.errors.items()
+            }
+            elapsed = time.perf_counter() - start
+        except WeaviateInsertManyAllFailedError as exc:
+            # Every object was rejected; the messages can't be matched to objects, so the
+            # batch is retried only if all of them are transient
+            messages = str(exc).split(ALL_FAILED_PREFIX, 1)[-1].split("\n")
+            transient = all(is_transient_message(message) for message in messages)
+            errors = {index: (str(exc), transient) for index in range(len(objects))}
+            elapsed = None
+        except REQUEST_ERRORS as exc:
+            # The request as a whole failed (timeout, connection, server error)
+            transient = is_transient_error(exc)
+            errors = {index: (str(exc), transient) for index in range(len(objects))}
+            elapsed = None
+            if self.config.adaptive:
+                self.batch_size = max(self.config.min_batch_size, self.batch_size // 2)
+
+        for index, (message, transient) in errors.items():
+            obj, attempt = objects[index], attempts[index]
+            if transient and attempt < self.config.max_retries:
+                due_at = time.monotonic() + self.config.retry_backoff * 2 ** attempt
+                self._retries.append((due_at, attempt + 1, obj))
+                self.retried += 1
+                continue
+            self.failed.append({"uuid": str(obj.uuid), "message": message})
+            if self.dead_letters is not None:
+                self.dead_letters.write(str(obj.uuid), obj.properties, obj.vector, message, transient)
+
+        self.imported += len(objects) - len(errors)
+        count("objects_imported", len(objects) - len(errors))
+        count("objects_failed", len(errors))
+        if self.journal is not None:
+            acknowledged = [str(obj.uuid) for index, obj in enumerate(objects) if index not in errors]
+            self.journal.record(acknowledged)
+        return elapsed
+
+    def _adjust(self, elapsed: float) -> None:
+        config = self.config
+        if not config.adaptive or elapsed <= 0:
+            return
+        # Scale proportionally towards the target latency, at most 2x per step
+        factor = min(2.0, max(0.5, config.target_latency / elapsed))
+        self.batch_size = int(
+            min(config.max_batch_size, max(config.min_batch_size, self.batch_size * factor))
+        )
@@ -0,0 +1,119 @@
+#
+# Weaviate Academy
+# Benchmark: serial `vectorize` calls vs. `EmbeddingPipeline` against a local fake embedding server
+#
+# The fake server answers POST /embed {"texts": [...]} with deterministic vectors after a
+# simulated latency, and returns 429 when more than `--max-concurrent` requests are open.
+#
+# Usage: python bench_embedding_pipeline.py [--texts 2000] [--latency 0.2] [--max-concurrent 6]
+#
+import argparse
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List
+
+import requests
+
+from embedding_pipeline import EmbeddingPipeline
+
+
+DIMENSIONS = 1024
+
+
+def fake_vector(text: str) -> List[float]:
+    # Deterministic pseudo-embedding derived from the text digest
+    seed = hashlib.sha256(text.encode("utf-8")).digest()
+    return [(seed[i % len(seed)] - 128) / 128 for i in range(DIMENSIONS)]
+
+
+def make_handler(latency: float, max_concurrent: int):
+    lock = threading.Lock()
+    open_requests = [0]
+
+    class FakeEmbeddingHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            with lock:
+                open_requests[0] += 1
+                limited = open_requests[0] > max_concurrent
+            try:
+                if limited:
+                    self.send_response(429)
+                    self.end_headers()
+                    return
+                # Simulated model latency: fixed cost plus a small per-text cost
+                time.sleep(latency + 0.001 * len(body["texts"]))
+                payload = json.dumps({"embeddings": [fake_vector(t) for t in body["texts"]]})
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.end_headers()
+                self.wfile.write(payload.encode("utf-8"))
+            finally:
+                with lock:
+                    open_requests[0] -= 1
+
+        def log_message(self, *args):
+            pass
+
+    return FakeEmbeddingHandler
+
+
+def start_server(latency: float, max_concurrent: int) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(latency, max_concurrent))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def make_vectorize(url: str):
+    session = requests.Session()
+
+    # Same shape as `vectorize` in 02-101v.py, with the client already bound
+    def vectorize(texts: List[str]) -> List[List[float]]:
+        resp = session.post(url, json={"texts": texts}, timeout=30)
+        resp.raise_for_status()
+        return resp.json()["embeddings"]
+
+    return vectorize
+
+
+def serial(vectorize, texts: List[str], batch_size: int = 50) -> List[List[float]]:
+    # The original loop: one blocking call per batch of 50
+    output = []
+    for start in range(0, len(texts), batch_size):
+        output.extend(vectorize(texts[start:start + batch_size]))
+    return output
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--texts", type=int, default=2000)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--max-concurrent", type=int, default=6)
+    parser.add_argument("--in-flight", type=int, nargs="+", default=[2, 4, 8, 16])
+    args = parser.parse_args()
+
+    server = start_server(args.latency, args.max_concurrent)
+    url = f"http://127.0.0.1:{server.server_address[1]}/embed"
+    texts = [f"Title Movie {i}; Overview: A story about something." for i in range(args.texts)]
+    expected = [fake_vector(t) for t in texts]
+
+    start = time.perf_counter()
+    assert serial(make_vectorize(url), texts) == expected
+    baseline = time.perf_counter() - start
+    print(f"serial:              {baseline:.2f}s ({len(texts) / baseline:,.0f} texts/s)")
+
+    for in_flight in args.in_flight:
+        pipeline = EmbeddingPipeline(max_in_flight=in_flight, batch_size=50, backoff=0.1)
+        start = time.perf_counter()
+        assert pipeline.run(make_vectorize(url), texts) == expected
+        elapsed = time.perf_counter() - start
+        print(
+            f"pipeline in_flight={in_flight:<3} {elapsed:.2f}s ({len(texts) / elapsed:,.0f} texts/s, "
+            f"{baseline / elapsed:.1f}x, {pipeline.calls} calls, {pipeline.retries} retries, "
+            f"final in_flight={pipeline.limit}, batch_size={pipeline.batch_size})"
+        )
+
+    server.shutdown()
@@ -0,0 +1,292 @@
+#
+# Weaviate Academy
+# Benchmark: end-to-end import throughput of the course loaders, without external APIs
+#
+# Runs the shared ingestion path used by 01-101t.py, 02-101v.py, 03a and 04a
+# (`load_movies`) on synthetic movies and posters, against the Weaviate started by
+#
+#   docker compose -f docker-compose-bench.yaml up -d
+#
+# where text2vec-transformers and multi2vec-clip are served by fake_vectorizer.py.
+# text2vec-openai is swapped for text2vec-transformers and 02's Cohere vectors for
+# random ones; everything on the client side is the code the course scripts run.
+#
+# For every profile it reports objects/s, payload bytes/s, peak RSS and the time spent
+# per stage: fetch (dataset + posters over HTTP into a cold cache), transform (rows to
+# objects), encode (posters resized with --poster-size and base64-encoded), and send
+# (batch requests, including server-side vectorization). Stage times are the
+# instrumentation.py totals of the real import, summed over the loader's worker
+# processes, so with --workers > 1 they can add up to more than the wall time. Each
+# profile gets its own empty download and poster cache in the temporary directory.
+# Save a run with --save and compare a later one with --compare to spot regressions in
+# the hot loop.
+#
+# Usage: python bench_import.py [--rows 2000] [--profiles text vectors multimodal named]
+#                               [--workers 1] [--poster-size 224] [--save FILE] [--compare FILE]
+#
+import argparse
+import io
+import json
+import os
+import resource
+import sys
+import tempfile
+import threading
+import time
+import zipfile
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import weaviate
+import weaviate.classes.config as wc
+from PIL import Image
+
+import instrumentation
+import poster_resize
+from batching import BatchConfig
+from bench_movie_data import make_movies
+from dataset_cache import fetch
+from embedding_store import save_embeddings
+from movie_loader import load_movies
+from poster_resize import PosterOptions
+from poster_stream import poster_name
+
+
+COLLECTION = "MovieImportBench"
+REGRESSION_THRESHOLD = 0.10  # Flag stages / throughput more than 10% worse than the baseline
+
+MOVIE_PROPERTIES = [
+    wc.Property(name="title", data_type=wc.DataType.TEXT),
+    wc.Property(name="overview", data_type=wc.DataType.TEXT),
+    wc.Property(name="vote_average", data_type=wc.DataType.NUMBER),
+    wc.Property(name="genre_ids", data_type=wc.DataType.INT_ARRAY),
+    wc.Property(name="release_date", data_type=wc.DataType.DATE),
+    wc.Property(name="tmdb_id", data_type=wc.DataType.INT),
+]
+POSTER_PROPERTY = wc.Property(name="poster", data_type=wc.DataType.BLOB)
+
+# Collection setup of each course loader, with the fake vectorizer modules
+PROFILES = {
+    # 01-101t.py: text2vec-openai
+    "text": dict(
+        properties=MOVIE_PROPERTIES,
+        vectorizer_config=wc.Configure.Vectorizer.text2vec_transformers(),
+    ),
+    # 02-101v.py: bring-your-own vectors
+    "vectors": dict(
+        properties=MOVIE_PROPERTIES,
+        vectorizer_config=wc.Configure.Vectorizer.none(),
+    ),
+    # 03a-101m-load-db.py: multi2vec-clip over poster + title
+    "multimodal": dict(
+        properties=MOVIE_PROPERTIES + [POSTER_PROPERTY],
+        vectorizer_config=wc.Configure.Vectorizer.multi2vec_clip(
+            image_fields=[wc.Multi2VecField(name="poster", weight=0.9)],
+            text_fields=[wc.Multi2VecField(name="title", weight=0.1)],
+        ),
+    ),
+    # 04a-220-load-db.py: named vectors for title, overview and poster + title
+    "named": dict(
+        properties=MOVIE_PROPERTIES + [POSTER_PROPERTY],
+        vectorizer_config=[
+            wc.Configure.NamedVectors.text2vec_transformers(name="title", source_properties=["title"]),
+            wc.Configure.NamedVectors.text2vec_transformers(name="overview", source_properties=["overview"]),
+            wc.Configure.NamedVectors.multi2vec_clip(
+                name="poster_title",
+                image_fields=[wc.Multi2VecField(name="poster", weight=0.9)],
+                text_fields=[wc.Multi2VecField(name="title", weight=0.1)],
+            ),
+        ],
+    ),
+}
+POSTER_PROFILES = ("multimodal", "named")
+# instrumentation.py stages that make up each reported stage
+STAGES = {
+    "transform": ["transform"],
+    "encode": ["poster_prepare", "poster_read", "poster_resize", "poster_encode"],
+    "send": ["batch_send"],
+}
+
+
+def make_posters(zip_path: Path, tmdb_ids, width: int = 500, height: int = 750) -> None:
+    # Noisy JPEGs roughly the size of the real TMDB posters
+    rng = np.random.default_rng(42)
+    with zipfile.ZipFile(zip_path, "w") as zip_file:
+        for tmdb_id in tmdb_ids:
+            pixels = rng.integers(0, 255, (height // 4, width // 4, 3), dtype=np.uint8)
+            image = Image.fromarray(pixels).resize((width, height))
+            buffer = io.BytesIO()
+            image.save(buffer, format="JPEG", quality=90)
+            zip_file.writestr(poster_name(tmdb_id), buffer.getvalue())
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_directory(directory: Path) -> ThreadingHTTPServer:
+    # Local HTTP server standing in for raw.githubusercontent.com
+    server = ThreadingHTTPServer(("127.0.0.1", 0), partial(QuietHandler, directory=str(directory)))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in KiB on Linux; loader worker processes count as children
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return max(own, children) / 1024
+
+
+def import_totals(metrics_dir: Path) -> Tuple[Dict[str, float], Dict[str, float]]:
+    # Stage seconds and counters of this process plus the worker processes' JSON files
+    summaries = [instrumentation.summary()]
+    summaries += [json.loads(path.read_text()) for path in sorted(metrics_dir.glob("*.json"))]
+    stages: Dict[str, float] = {}
+    counters: Dict[str, float] = {}
+    for summary in summaries:
+        for name, totals in summary["stages"].items():
+            stages[name] = stages.get(name, 0.0) + totals["total_s"]
+        for name, value in summary["counters"].items():
+            counters[name] = counters.get(name, 0.0) + value
+    return stages, counters
+
+
+def run_profile(
+    client: weaviate.WeaviateClient,
+    profile: str,
+    workdir: Path,
+    base_url: str,
+    workers: int,
+    poster_options: Optional[PosterOptions],
+) -> Dict[str, float]:
+    uses_posters = profile in POSTER_PROFILES
+
+    # A cold download and poster cache for this profile only, also for the worker processes,
+    # which report their stage totals to `metrics_dir`
+    cache_dir = Path(tempfile.mkdtemp(dir=workdir, prefix="cache_"))
+    metrics_dir = Path(tempfile.mkdtemp(dir=workdir, prefix="metrics_"))
+    os.environ["WEAVIATE_ACADEMY_CACHE"] = str(cache_dir)
+    os.environ["WEAVIATE_INSTRUMENT_DIR"] = str(metrics_dir)
+    poster_resize.POSTER_CACHE_DIR = cache_dir / "posters"
+
+    # Stage: fetch
+    start = time.perf_counter()
+    df = pd.DataFrame(json.loads(fetch(f"{base_url}/movies.json", cache_dir=cache_dir).read_bytes()))
+    posters_path = fetch(f"{base_url}/posters.zip", cache_dir=cache_dir) if uses_posters else None
+    fetch_time = time.perf_counter() - start
+
+    options = {}
+    if uses_posters:
+        options.update(posters_path=posters_path, poster_options=poster_options)
+    if profile == "vectors":
+        vectors_path = workdir / "vectors.npy"
+        rng = np.random.default_rng(42)
+        save_embeddings(vectors_path, df["id"], rng.standard_normal((len(df), 1024)))
+        options.update(vectors_path=vectors_path)
+
+    if client.collections.exists(COLLECTION):
+        client.collections.delete(COLLECTION)
+    client.collections.create(name=COLLECTION, **PROFILES[profile])
+
+    # Full import; transform, encode and send are timed inside it
+    instrumentation.reset()
+    start = time.perf_counter()
+    report = load_movies(
+        COLLECTION, df, workers=workers, batching=BatchConfig(batch_size=50 if uses_posters else 200), **options
+    )
+    load_time = time.perf_counter() - start
+    client.collections.delete(COLLECTION)
+    stages, counters = import_totals(metrics_dir)
+    instrumentation.reset()
+
+    result = {
+        "objects": report.imported,
+        "failed": len(report.failed),
+        "objects_per_s": report.imported / load_time,
+        "bytes_per_s": counters.get("payload_bytes", 0) / load_time,
+        "peak_rss_mb": peak_rss_mb(),
+        "fetch_s": fetch_time,
+    }
+    for name, parts in STAGES.items():
+        result[f"{name}_s"] = sum(stages.get(part, 0.0) for part in parts)
+    result["total_s"] = load_time
+    return result
+
+
+def print_result(profile: str, result: Dict[str, float]) -> None:
+    print(
+        f"{profile:<11} {result['objects_per_s']:9,.0f} obj/s {result['bytes_per_s'] / 1e6:8.2f} MB/s "
+        f"rss {result['peak_rss_mb']:7.0f} MB | fetch {result['fetch_s']:6.2f}s "
+        f"transform {result['transform_s']:6.2f}s encode {result['encode_s']:6.2f}s "
+        f"send {result['send_s']:6.2f}s ({result['failed']} failed)"
+    )
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]]) -> bool:
+    # Print the changes against a saved run; returns True if anything regressed
+    regressed = False
+    for profile, result in results.items():
+        if profile not in baseline:
+            continue
+        before = baseline[profile]
+        checks = [("objects_per_s", True), ("fetch_s", False), ("transform_s", False), ("encode_s", False), ("send_s", False)]
+        for metric, higher_is_better in checks:
+            if not before.get(metric):
+                continue
+            change = result[metric] / before[metric] - 1
+            worse = -change if higher_is_better else change
+            flag = "  REGRESSION" if worse > REGRESSION_THRESHOLD else ""
+            regressed |= bool(flag)
+            print(f"{profile:<11} {metric:<14} {before[metric]:10.2f} -> {result[metric]:10.2f} ({change:+.0%}){flag}")
+    return regressed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--profiles", nargs="+", choices=list(PROFILES), default=list(PROFILES))
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--poster-size", type=int, help="Resize posters before import (see poster_resize.py)")
+    parser.add_argument("--save", help="Write the results as JSON")
+    parser.add_argument("--compare", help="Compare against results saved with --save")
+    args = parser.parse_args()
+
+    poster_options = PosterOptions(size=args.poster_size) if args.poster_size else None
+    # Stage timings, in this process and in the loader's worker processes
+    os.environ["WEAVIATE_INSTRUMENT"] = "1"
+    instrumentation.enable()
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="bench_import_") as tmp:
+        workdir = Path(tmp)
+        site = workdir / "site"
+        site.mkdir()
+        df = make_movies(args.rows)
+        (site / "movies.json").write_text(df.to_json(orient="records"))
+        if any(profile in POSTER_PROFILES for profile in args.profiles):
+            make_posters(site / "posters.zip", df["id"])
+
+        server = serve_directory(site)
+        base_url = f"http://127.0.0.1:{server.server_address[1]}"
+        client = weaviate.connect_to_local()
+        try:
+            for profile in args.profiles:
+                results[profile] = run_profile(client, profile, workdir, base_url, args.workers, poster_options)
+        finally:
+            client.close()
+            server.shutdown()
+
+    print()
+    for profile, result in results.items():
+        print_result(profile, result)
+    if args.save:
+        Path(args.save).write_text(json.dumps(results, indent=2))
+    if args.compare:
+        print()
+        if compare(results, json.loads(Path(args.compare).read_text())):
+            sys.exit(1)
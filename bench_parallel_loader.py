@@ -0,0 +1,74 @@
+#
+# Weaviate Academy
+# Benchmark: loader throughput with 1, 2, 4 and 8 worker processes
+#
+# Needs a local Weaviate instance, e.g. `docker compose -f docker-compose.yaml up -d`.
+# Objects carry random precomputed vectors so that no vectorizer module is involved
+# and the numbers reflect the client-side pipeline and the insert path only.
+#
+# Usage: python bench_parallel_loader.py [--rows 20000] [--workers 1 2 4 8]
+#
+import argparse
+import time
+
+import numpy as np
+import weaviate
+import weaviate.classes.config as wc
+
+from batching import BatchConfig
+from bench_movie_data import make_movies
+from embedding_store import save_embeddings
+from movie_loader import load_movies
+
+
+COLLECTION = "MovieLoaderBench"
+
+
+def recreate_collection(client: weaviate.WeaviateClient) -> None:
+    if client.collections.exists(COLLECTION):
+        client.collections.delete(COLLECTION)
+    client.collections.create(
+        name=COLLECTION,
+        properties=[
+            wc.Property(name="title", data_type=wc.DataType.TEXT),
+            wc.Property(name="overview", data_type=wc.DataType.TEXT),
+            wc.Property(name="vote_average", data_type=wc.DataType.NUMBER),
+            wc.Property(name="genre_ids", data_type=wc.DataType.INT_ARRAY),
+            wc.Property(name="release_date", data_type=wc.DataType.DATE),
+            wc.Property(name="tmdb_id", data_type=wc.DataType.INT),
+        ],
+        vectorizer_config=wc.Configure.Vectorizer.none(),
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--dimensions", type=int, default=1024)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument("--fixed", action="store_true", help="Disable adaptive batch sizing")
+    args = parser.parse_args()
+
+    df = make_movies(args.rows)
+    vectors_path = "scratch/bench_parallel_loader_vectors.npy"
+    rng = np.random.default_rng(42)
+    save_embeddings(vectors_path, df["id"], rng.standard_normal((args.rows, args.dimensions)))
+
+    client = weaviate.connect_to_local()
+    try:
+        for workers in args.workers:
+            recreate_collection(client)
+            start = time.perf_counter()
+            report = load_movies(
+                COLLECTION, df, workers=workers, vectors_path=vectors_path,
+                batching=BatchConfig(batch_size=args.batch_size, adaptive=not args.fixed),
+            )
+            elapsed = time.perf_counter() - start
+            print(
+                f"workers={workers:<2} {elapsed:7.2f}s  {report.imported / elapsed:9,.0f} objects/s  "
+                f"({len(report.failed)} failed)"
+            )
+        client.collections.delete(COLLECTION)
+    finally:
+        client.close()
@@ -0,0 +1,255 @@
+#
+# Weaviate Academy
+# Benchmark: query latency under load, with percentiles per query kind and target vector
+#
+# Replays a weighted mix of the queries from 03b-03h, 04b and 04c (near_text,
+# near_image, bm25, hybrid, filtered and generative) against a local instance with a
+# fixed number of concurrent clients, and reports p50/p95/p99 latency, throughput and
+# error rate per query kind and `target_vector`. Results are not cached client-side.
+#
+# Generative queries call the LLM for every request, so they are off unless weighted in.
+#
+# Usage:
+#   python bench_queries.py --collection MovieMM --mix near_text=4 bm25=2 hybrid=2 filtered=1 near_image=1
+#   python bench_queries.py --collection MovieNVDemo --target-vectors title overview poster_title \
+#       --concurrency 16 --duration 60 --json results.json
+#
+import argparse
+import itertools
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import weaviate.classes.query as wq
+
+from client_factory import close_clients, get_client
+from image_query import url_to_base64
+
+
+DEFAULT_QUERIES = [
+    "red",
+    "history",
+    "dystopian future",
+    "A joyful holiday film",
+    "Science fiction film set in space",
+    "romantic comedy in Paris",
+    "heist gone wrong",
+    "coming of age",
+]
+DEFAULT_IMAGE = "https://github.com/weaviate-tutorials/edu-datasets/blob/main/img/International_Space_Station_after_undocking_of_STS-132.jpg?raw=true"
+RECENT = datetime(2020, 1, 1, tzinfo=timezone.utc)
+
+# Query kind -> (function running it, whether it takes a target vector)
+QueryFn = Callable[..., object]
+QUERY_KINDS: Dict[str, Tuple[QueryFn, bool]] = {
+    "near_text": (
+        lambda movies, text, image, target, limit: movies.query.near_text(
+            query=text, target_vector=target, limit=limit
+        ),
+        True,
+    ),
+    "near_image": (
+        lambda movies, text, image, target, limit: movies.query.near_image(
+            near_image=image, target_vector=target, limit=limit
+        ),
+        True,
+    ),
+    "bm25": (
+        lambda movies, text, image, target, limit: movies.query.bm25(query=text, limit=limit),
+        False,
+    ),
+    "hybrid": (
+        lambda movies, text, image, target, limit: movies.query.hybrid(
+            query=text, target_vector=target, limit=limit
+        ),
+        True,
+    ),
+    "filtered": (
+        lambda movies, text, image, target, limit: movies.query.near_text(
+            query=text,
+            target_vector=target,
+            limit=limit,
+            filters=wq.Filter.by_property("release_date").greater_than(RECENT),
+        ),
+        True,
+    ),
+    "generative": (
+        lambda movies, text, image, target, limit: movies.generate.near_text(
+            query=text,
+            target_vector=target,
+            limit=limit,
+            single_prompt="Translate this into French: {title}",
+        ),
+        True,
+    ),
+}
+
+
+def parse_mix(items: List[str]) -> Dict[str, float]:
+    mix = {}
+    for item in items:
+        kind, _, weight = item.partition("=")
+        if kind not in QUERY_KINDS:
+            raise ValueError(f"Unknown query kind {kind!r}; choose from {', '.join(QUERY_KINDS)}")
+        mix[kind] = float(weight or 1)
+    return mix
+
+
+def plan_requests(
+    mix: Dict[str, float], target_vectors: List[Optional[str]], count: int, seed: int = 42
+) -> List[Tuple[str, Optional[str]]]:
+    # Draw `count` (kind, target vector) pairs according to the weights
+    rng = random.Random(seed)
+    kinds = rng.choices(list(mix), weights=list(mix.values()), k=count)
+    targets = itertools.cycle(target_vectors)
+    return [(kind, next(targets) if QUERY_KINDS[kind][1] else None) for kind in kinds]
+
+
+def percentiles(latencies: List[float]) -> Tuple[float, float, float]:
+    if not latencies:
+        return (float("nan"),) * 3
+    p50, p95, p99 = np.percentile(np.asarray(latencies) * 1000, [50, 95, 99])
+    return p50, p95, p99
+
+
+class Recorder:
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (kind, target vector) -> [latencies of successful requests, error count]
+        self.results: Dict[Tuple[str, Optional[str]], List] = {}
+
+    def record(self, key: Tuple[str, Optional[str]], latency: Optional[float]) -> None:
+        with self._lock:
+            entry = self.results.setdefault(key, [[], 0])
+            if latency is None:
+                entry[1] += 1
+            else:
+                entry[0].append(latency)
+
+    def summary(self, elapsed: float) -> List[Dict]:
+        rows = []
+        for (kind, target), (latencies, errors) in sorted(self.results.items(), key=lambda item: str(item[0])):
+            total = len(latencies) + errors
+            p50, p95, p99 = percentiles(latencies)
+            rows.append({
+                "kind": kind,
+                "target_vector": target,
+                "requests": total,
+                "errors": errors,
+                "error_rate": errors / total if total else 0.0,
+                "throughput": total / elapsed,
+                "p50_ms": p50,
+                "p95_ms": p95,
+                "p99_ms": p99,
+            })
+        return rows
+
+
+def run(
+    collection_name: str,
+    plan: List[Tuple[str, Optional[str]]],
+    concurrency: int,
+    duration: Optional[float],
+    queries: List[str],
+    image_b64: Optional[str],
+    limit: int,
+    headers: Dict[str, str],
+) -> Tuple[Recorder, float]:
+    movies = get_client(headers).collections.get(collection_name)
+    recorder = Recorder()
+    deadline = time.monotonic() + duration if duration else None
+    texts = itertools.cycle(queries)
+    errors_shown = set()
+
+    def one(request: Tuple[str, Optional[str]], text: str) -> None:
+        if deadline is not None and time.monotonic() > deadline:
+            return
+        kind, target = request
+        start = time.perf_counter()
+        try:
+            QUERY_KINDS[kind][0](movies, text, image_b64, target, limit)
+        except Exception as exc:
+            recorder.record(request, None)
+            # Show the first error of each kind, the rest only count
+            if request not in errors_shown:
+                errors_shown.add(request)
+                print(f"{kind} ({target}) failed: {exc}")
+            return
+        recorder.record(request, time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        # With --duration the plan is replayed until the time is up
+        requests = itertools.cycle(plan) if deadline is not None else plan
+        pending = []
+        for request in requests:
+            if deadline is not None and time.monotonic() > deadline:
+                break
+            pending.append(executor.submit(one, request, next(texts)))
+            # Keep the queue short so the run stops promptly at the deadline
+            if len(pending) >= concurrency * 4:
+                pending.pop(0).result()
+        for future in pending:
+            future.result()
+    return recorder, time.perf_counter() - start
+
+
+def print_summary(rows: List[Dict], elapsed: float) -> None:
+    print(f"\n{'kind':<11} {'target':<13} {'requests':>8} {'err %':>7} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for row in rows:
+        print(
+            f"{row['kind']:<11} {str(row['target_vector'] or '-'):<13} {row['requests']:>8} "
+            f"{row['error_rate']:>6.1%} {row['throughput']:>8.1f} "
+            f"{row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f} {row['p99_ms']:>8.1f}"
+        )
+    total = sum(row["requests"] for row in rows)
+    print(f"\n{total} requests in {elapsed:.1f}s ({total / elapsed:.1f} req/s)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--collection", default="MovieMM")
+    parser.add_argument("--mix", nargs="+", default=["near_text=4", "bm25=2", "hybrid=2", "filtered=1", "near_image=1"],
+                        help="Query kinds with weights, e.g. near_text=4 bm25=1 generative=0.1")
+    parser.add_argument("--target-vectors", nargs="+", default=[None],
+                        help="Named vectors to spread vector queries over (MovieNVDemo)")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--duration", type=float, help="Run for this many seconds instead of --requests")
+    parser.add_argument("--warmup", type=int, default=20, help="Requests sent before measuring")
+    parser.add_argument("--limit", type=int, default=5)
+    parser.add_argument("--queries-file", help="Query texts, one per line")
+    parser.add_argument("--image", default=DEFAULT_IMAGE)
+    parser.add_argument("--json", help="Write the per-kind results as JSON")
+    args = parser.parse_args()
+
+    headers = {"X-OpenAI-Api-Key": os.getenv("OPENAI_API_KEY")}
+    mix = parse_mix(args.mix)
+    queries = DEFAULT_QUERIES
+    if args.queries_file:
+        with open(args.queries_file) as file:
+            queries = [line.strip() for line in file if line.strip()]
+    image_b64 = url_to_base64(args.image) if "near_image" in mix else None
+
+    try:
+        if args.warmup:
+            run(args.collection, plan_requests(mix, args.target_vectors, args.warmup, seed=0),
+                args.concurrency, None, queries, image_b64, args.limit, headers)
+        plan = plan_requests(mix, args.target_vectors, args.requests)
+        recorder, elapsed = run(
+            args.collection, plan, args.concurrency, args.duration, queries, image_b64, args.limit, headers
+        )
+    finally:
+        close_clients()
+
+    rows = recorder.summary(elapsed)
+    print_summary(rows, elapsed)
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump({"collection": args.collection, "concurrency": args.concurrency, "elapsed": elapsed, "results": rows}, file, indent=2)
@@ -0,0 +1,66 @@
+#
+# Weaviate Academy
+# Checkpoint journal for resumable imports
+#
+# Every batch acknowledged by Weaviate is appended to a journal (one JSON line holding
+# the UUIDs that were stored) and fsync'ed. If an import dies part way through, the
+# next run reads the journals back and skips the acknowledged objects. Object UUIDs are
+# deterministic, so a batch that was sent but not yet journaled is simply written again
+# rather than duplicated.
+#
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import List, Set
+
+
+CHECKPOINT_DIR = Path("scratch/checkpoints")
+
+
+def checkpoint_dir(collection_name: str) -> Path:
+    return CHECKPOINT_DIR / collection_name
+
+
+def has_checkpoint(collection_name: str) -> bool:
+    # True if an earlier import of this collection did not finish
+    directory = checkpoint_dir(collection_name)
+    return directory.exists() and any(directory.glob("shard-*.jsonl"))
+
+
+def acknowledged_uuids(collection_name: str) -> Set[str]:
+    uuids = set()
+    for path in checkpoint_dir(collection_name).glob("shard-*.jsonl"):
+        with open(path) as file:
+            for line in file:
+                try:
+                    uuids.update(json.loads(line)["uuids"])
+                except json.JSONDecodeError:
+                    # A torn last line from a crash mid-write; that batch is simply re-sent
+                    break
+    return uuids
+
+
+def clear_checkpoint(collection_name: str) -> None:
+    shutil.rmtree(checkpoint_dir(collection_name), ignore_errors=True)
+
+
+class CheckpointJournal:
+    def __init__(self, collection_name: str, shard: int = 0):
+        directory = checkpoint_dir(collection_name)
+        directory.mkdir(parents=True, exist_ok=True)
+        self._file = open(directory / f"shard-{shard}.jsonl", "a")
+
+    def __enter__(self) -> "CheckpointJournal":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def record(self, uuids: List[str]) -> None:
+        self._file.write(json.dumps({"uuids": uuids}) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        self._file.close()
@@ -0,0 +1,157 @@
+#
+# Weaviate Academy
+# Shared, long-lived Weaviate clients for the query scripts and services
+#
+# `get_client(headers)` hands out one connected client per set of headers and keeps it
+# warm: the HTTP and gRPC connections are reused by every caller, and a background
+# thread checks `is_live()` periodically and marks a client whose connection died as
+# stale. The next `get_client` call then hands out a fresh client. Stale clients are not
+# closed, since callers may still hold them; `close_clients()` closes them with the rest.
+# The sync client is safe to share between threads. `get_async_client` is the asyncio
+# equivalent (one client per event loop). Everything is closed at interpreter exit.
+#
+import asyncio
+import atexit
+import threading
+from typing import Dict, List, Optional, Set, Tuple
+
+import weaviate
+
+
+HEALTH_CHECK_INTERVAL = 30.0  # Seconds between background liveness checks
+
+_lock = threading.Lock()
+_clients: Dict[Tuple, weaviate.WeaviateClient] = {}
+_stale: Set[Tuple] = set()
+_retired: List[weaviate.WeaviateClient] = []  # Replaced clients, closed by close_clients()
+_stop = threading.Event()
+_health_thread: Optional[threading.Thread] = None
+
+_async_clients: Dict[Tuple, weaviate.WeaviateAsyncClient] = {}
+_async_stale: Set[Tuple] = set()
+_async_retired: Dict[int, List[weaviate.WeaviateAsyncClient]] = {}
+_async_locks: Dict[int, asyncio.Lock] = {}
+_async_health_tasks: Dict[int, asyncio.Task] = {}
+
+
+def _key(headers: Optional[Dict[str, str]]) -> Tuple:
+    return tuple(sorted((headers or {}).items()))
+
+
+def _connect(key: Tuple) -> weaviate.WeaviateClient:
+    return weaviate.connect_to_local(headers=dict(key) or None)
+
+
+def _is_healthy(client: weaviate.WeaviateClient) -> bool:
+    try:
+        return client.is_connected() and client.is_live()
+    except Exception:
+        return False
+
+
+def _health_loop() -> None:
+    while not _stop.wait(HEALTH_CHECK_INTERVAL):
+        with _lock:
+            clients = list(_clients.items())
+        for key, client in clients:
+            if not _is_healthy(client):
+                # Replaced on the next get_client(); callers keep the old one until then
+                with _lock:
+                    if _clients.get(key) is client:
+                        _stale.add(key)
+
+
+def get_client(headers: Optional[Dict[str, str]] = None) -> weaviate.WeaviateClient:
+    # Return the shared client for `headers`, connecting on first use
+    global _health_thread
+    key = _key(headers)
+    with _lock:
+        client = _clients.get(key)
+        # A stale client that has recovered since the health check is kept
+        stale = key in _stale and not _is_healthy(client)
+        if client is None or stale or not client.is_connected():
+            replacement = _connect(key)
+            if client is not None:
+                _retired.append(client)
+            client = _clients[key] = replacement
+        _stale.discard(key)
+        if _health_thread is None:
+            _stop.clear()
+            _health_thread = threading.Thread(target=_health_loop, name="weaviate-health", daemon=True)
+            _health_thread.start()
+        return client
+
+
+def close_clients() -> None:
+    global _health_thread
+    _stop.set()
+    with _lock:
+        clients = list(_clients.values()) + _retired
+        _clients.clear()
+        _stale.clear()
+        _retired.clear()
+        _health_thread = None
+    for client in clients:
+        try:
+            client.close()
+        except Exception:
+            pass
+
+
+async def _is_healthy_async(client: weaviate.WeaviateAsyncClient) -> bool:
+    try:
+        return client.is_connected() and await client.is_live()
+    except Exception:
+        return False
+
+
+async def _async_health_loop(loop_id: int) -> None:
+    while True:
+        await asyncio.sleep(HEALTH_CHECK_INTERVAL)
+        for key, client in list(_async_clients.items()):
+            if key[0] != loop_id:
+                continue
+            if not await _is_healthy_async(client):
+                # As for the sync clients: replaced on the next get_async_client()
+                _async_stale.add(key)
+
+
+async def get_async_client(headers: Optional[Dict[str, str]] = None) -> weaviate.WeaviateAsyncClient:
+    # Async clients are bound to the event loop they were connected on
+    loop_id = id(asyncio.get_running_loop())
+    key = (loop_id, *_key(headers))
+    lock = _async_locks.setdefault(loop_id, asyncio.Lock())
+    async with lock:
+        client = _async_clients.get(key)
+        stale = key in _async_stale and not await _is_healthy_async(client)
+        if client is None or stale or not client.is_connected():
+            replacement = weaviate.use_async_with_local(headers=headers)
+            await replacement.connect()
+            if client is not None:
+                _async_retired.setdefault(loop_id, []).append(client)
+            client = _async_clients[key] = replacement
+        _async_stale.discard(key)
+        if loop_id not in _async_health_tasks:
+            _async_health_tasks[loop_id] = asyncio.create_task(_async_health_loop(loop_id))
+        return client
+
+
+async def close_async_clients() -> None:
+    # Close the async clients of the running event loop
+    loop_id = id(asyncio.get_running_loop())
+    task = _async_health_tasks.pop(loop_id, None)
+    if task is not None:
+        task.cancel()
+    clients = _async_retired.pop(loop_id, [])
+    for key in [key for key in _async_clients if key[0] == loop_id]:
+        _async_stale.discard(key)
+        clients.append(_async_clients.pop(key))
+    for client in clients:
+        try:
+            await client.close()
+        except Exception:
+            pass
+    _async_locks.pop(loop_id, None)
+
+
+atexit.register(close_clients)
@@ -0,0 +1,26 @@
+#
+# Weaviate Academy
+# Small concurrency helpers shared by the loaders and query tools
+#
+from collections import deque
+from concurrent.futures import Executor
+from typing import Callable, Iterable, Iterator, TypeVar
+
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def ordered_map(
+    executor: Executor, fn: Callable[[T], R], items: Iterable[T], max_pending: int
+) -> Iterator[R]:
+    # Like `executor.map`, but consumes `items` lazily and never has more than
+    # `max_pending` results outstanding, so memory stays flat however long the input is.
+    # Results are yielded in input order.
+    pending = deque()
+    for item in items:
+        pending.append(executor.submit(fn, item))
+        if len(pending) >= max_pending:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
@@ -0,0 +1,128 @@
+#
+# Weaviate Academy
+# Local on-disk cache for the datasets the loader scripts download
+#
+# Payloads are stored once under their SHA-256 digest (`blobs/`), and each URL has a
+# small JSON entry (`urls/`) recording the digest plus the ETag / Last-Modified headers
+# the server sent. A cached URL is revalidated with a conditional request; if the server
+# answers 304, or cannot be reached at all, the cached copy is used.
+#
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Dict, Optional
+
+import requests
+
+from instrumentation import stage
+
+
+CACHE_DIR = Path(os.getenv("WEAVIATE_ACADEMY_CACHE", "scratch/cache"))
+# Set WEAVIATE_ACADEMY_OFFLINE=1 to never touch the network when a cached copy exists
+OFFLINE = os.getenv("WEAVIATE_ACADEMY_OFFLINE") == "1"
+
+
+def _url_entry_path(url: str, cache_dir: Path) -> Path:
+    return cache_dir / "urls" / (hashlib.sha256(url.encode("utf-8")).hexdigest() + ".json")
+
+
+def _blob_path(digest: str, cache_dir: Path) -> Path:
+    return cache_dir / "blobs" / digest[:2] / digest
+
+
+def _read_entry(url: str, cache_dir: Path) -> Optional[Dict]:
+    entry_path = _url_entry_path(url, cache_dir)
+    if not entry_path.exists():
+        return None
+    entry = json.loads(entry_path.read_text())
+    # Ignore entries whose payload has been removed from the cache
+    if not _blob_path(entry["digest"], cache_dir).exists():
+        return None
+    return entry
+
+
+def _write_atomic(path: Path, data: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_text(data)
+    os.replace(tmp_path, path)
+
+
+def _store_response(resp: requests.Response, cache_dir: Path) -> str:
+    # Stream the body to a temporary file while hashing it, then move it into place
+    blobs_dir = cache_dir / "blobs"
+    blobs_dir.mkdir(parents=True, exist_ok=True)
+    sha = hashlib.sha256()
+    fd, tmp_name = tempfile.mkstemp(dir=blobs_dir, suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as file:
+            for chunk in resp.iter_content(chunk_size=1 << 20):
+                sha.update(chunk)
+                file.write(chunk)
+        digest = sha.hexdigest()
+        blob_path = _blob_path(digest, cache_dir)
+        blob_path.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(tmp_name, blob_path)
+    except BaseException:
+        if os.path.exists(tmp_name):
+            os.remove(tmp_name)
+        raise
+    return digest
+
+
+def fetch(
+    url: str,
+    cache_dir: Path = CACHE_DIR,
+    offline: bool = OFFLINE,
+    timeout: float = 30.0,
+) -> Path:
+    # Return the path of a local, up-to-date copy of `url`
+    cache_dir = Path(cache_dir)
+    entry = _read_entry(url, cache_dir)
+
+    if entry is not None and offline:
+        return _blob_path(entry["digest"], cache_dir)
+    if entry is None and offline:
+        raise FileNotFoundError(f"No cached copy of {url} available offline")
+
+    # Revalidate the cached copy with a conditional request
+    headers = {}
+    if entry is not None:
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+    with stage("fetch", url=url):
+        try:
+            resp = requests.get(url, headers=headers, stream=True, timeout=timeout)
+        except (requests.ConnectionError, requests.Timeout):
+            if entry is None:
+                raise
+            print(f"Could not reach {url}; using cached copy.")
+            return _blob_path(entry["digest"], cache_dir)
+
+        with resp:
+            if resp.status_code == 304 and entry is not None:
+                return _blob_path(entry["digest"], cache_dir)
+            resp.raise_for_status()
+            digest = _store_response(resp, cache_dir)
+
+    entry = {
+        "url": url,
+        "digest": digest,
+        "etag": resp.headers.get("ETag"),
+        "last_modified": resp.headers.get("Last-Modified"),
+    }
+    _write_atomic(_url_entry_path(url, cache_dir), json.dumps(entry, indent=2))
+    return _blob_path(digest, cache_dir)
+
+
+def fetch_json(url: str, cache_dir: Path = CACHE_DIR, offline: bool = OFFLINE):
+    # Convenience wrapper for the movie JSON dataset
+    data = fetch(url, cache_dir=cache_dir, offline=offline).read_bytes()
+    with stage("json_decode", bytes=len(data)):
+        return json.loads(data)
+
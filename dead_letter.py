@@ -0,0 +1,129 @@
+#
+# Weaviate Academy
+# Dead-letter queue for objects the loaders could not import
+#
+# Objects that failed permanently, or kept failing after all retries, are appended to
+# `scratch/dead_letter/<collection>/shard-<n>.jsonl` together with the error. They can
+# be replayed later without re-running the whole import:
+#
+#   python dead_letter.py MovieMM
+#
+# A replayed file is deleted as soon as all its entries are stored or re-queued, so an
+# interrupted replay only repeats the file it was working on. Stored objects are recorded
+# in the sync manifest (sync_manifest.py), so the next incremental load skips them.
+#
+import json
+import os
+import shutil
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Union
+
+import weaviate
+
+from batching import BatchConfig, ObjectBatcher
+from query_cache import bump_generation
+from sync_manifest import record_stored
+
+
+DEAD_LETTER_DIR = Path("scratch/dead_letter")
+
+
+def dead_letter_dir(collection_name: str) -> Path:
+    return DEAD_LETTER_DIR / collection_name
+
+
+def _to_json(value):
+    # Dates and NumPy values (vector rows) are not JSON serialisable as-is
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    raise TypeError(f"Cannot serialise {type(value).__name__}")
+
+
+class DeadLetterQueue:
+    def __init__(self, collection_name: str, shard: Union[int, str] = 0):
+        self.path = dead_letter_dir(collection_name) / f"shard-{shard}.jsonl"
+        self.count = 0
+        self._file = None
+
+    def __enter__(self) -> "DeadLetterQueue":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def write(self, uuid: str, properties: Dict, vector, message: str, transient: bool) -> None:
+        # Only create the file once something actually fails
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, "a")
+        record = {
+            "uuid": uuid,
+            "properties": properties,
+            "vector": vector,
+            "error": message,
+            "transient": transient,
+        }
+        self._file.write(json.dumps(record, default=_to_json) + "\n")
+        self._file.flush()
+        self.count += 1
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+
+
+def dead_letter_files(collection_name: str) -> List[Path]:
+    return sorted(dead_letter_dir(collection_name).glob("shard-*.jsonl"))
+
+
+def read_dead_letters(paths: List[Path]) -> Iterator[Dict]:
+    for path in paths:
+        with open(path) as file:
+            for line in file:
+                yield json.loads(line)
+
+
+def clear_dead_letters(collection_name: str) -> None:
+    # A new import re-sends every object that is not stored, so older entries are obsolete
+    shutil.rmtree(dead_letter_dir(collection_name), ignore_errors=True)
+
+
+def replay_dead_letters(collection_name: str, headers: Optional[Dict[str, str]] = None) -> List[Dict]:
+    # Re-submit every dead-lettered object; whatever still fails goes to a new queue file
+    paths = dead_letter_files(collection_name)
+    if not paths:
+        return []
+
+    client = weaviate.connect_to_local(headers=headers)
+    replayed, imported, failed = 0, 0, []
+    try:
+        collection = client.collections.get(collection_name)
+        with DeadLetterQueue(collection_name, shard=f"replay{int(time.time())}") as dead_letters:
+            for path in paths:
+                uuids = []
+                with ObjectBatcher(collection, BatchConfig(), dead_letters=dead_letters) as batch:
+                    for record in read_dead_letters([path]):
+                        batch.add_object(record["properties"], record["uuid"], vector=record["vector"])
+                        uuids.append(record["uuid"])
+                        replayed += 1
+                still_failing = {failure["uuid"] for failure in batch.failed}
+                record_stored(collection_name, [uuid for uuid in uuids if uuid not in still_failing])
+                # Every entry of this file is now stored or in the new queue file
+                path.unlink()
+                imported += batch.imported
+                failed += batch.failed
+    finally:
+        client.close()
+        bump_generation(collection_name)
+
+    print(f"Replayed {replayed} objects: {imported} imported, {len(failed)} still failing")
+    return failed
+
+
+if __name__ == "__main__":
+    replay_dead_letters(sys.argv[1], headers={"X-OpenAI-Api-Key": os.getenv("OPENAI_API_KEY")})
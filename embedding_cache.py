@@ -0,0 +1,124 @@
+#
+# Weaviate Academy
+# Persistent embedding cache, keyed by (model, input_type, text digest)
+#
+# Vectors are kept in a SQLite file as float32 blobs. `get_or_embed` looks every text up
+# first and only sends the misses to the embedding provider, so re-running a loader on
+# an unchanged dataset makes no embedding calls at all. Vectors come back as float32
+# arrays (one matrix from `get_or_embed`), never as lists of Python floats.
+#
+import hashlib
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Sequence, Tuple
+
+import numpy as np
+
+
+DEFAULT_PATH = Path("scratch/embedding_cache.sqlite")
+
+
+def text_digest(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    def __init__(self, path: Path = DEFAULT_PATH):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # The embedding pipeline calls in from several threads; serialise access
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " model TEXT NOT NULL,"
+            " input_type TEXT NOT NULL,"
+            " digest TEXT NOT NULL,"
+            " vector BLOB NOT NULL,"
+            " PRIMARY KEY (model, input_type, digest))"
+        )
+        self.hits = 0
+        self.misses = 0
+
+    def _rows(self, model: str, input_type: str, digests: Sequence[str]) -> Iterator[Tuple[str, np.ndarray]]:
+        # Yield (digest, vector) for the cached digests; vectors are float32 views of the blobs
+        with self._lock:
+            # Stay below SQLite's limit on bound parameters
+            for start in range(0, len(digests), 500):
+                chunk = digests[start:start + 500]
+                rows = self._conn.execute(
+                    "SELECT digest, vector FROM embeddings"
+                    " WHERE model = ? AND input_type = ?"
+                    f" AND digest IN ({','.join('?' * len(chunk))})",
+                    [model, input_type, *chunk],
+                ).fetchall()
+                for digest, blob in rows:
+                    yield digest, np.frombuffer(blob, dtype=np.float32)
+
+    def get_many(self, model: str, input_type: str, texts: Sequence[str]) -> Dict[str, np.ndarray]:
+        # Return the cached vectors for `texts`, keyed by text digest
+        digests = list({text_digest(text) for text in texts})
+        return dict(self._rows(model, input_type, digests))
+
+    def put_many(
+        self, model: str, input_type: str, texts: Sequence[str], vectors: Sequence[Sequence[float]]
+    ) -> None:
+        rows = [
+            (model, input_type, text_digest(text), np.asarray(vector, dtype=np.float32).tobytes())
+            for text, vector in zip(texts, vectors)
+        ]
+        with self._lock, self._conn:
+            self._conn.executemany("INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?, ?)", rows)
+
+    def get_or_embed(
+        self,
+        model: str,
+        input_type: str,
+        texts: Sequence[str],
+        embed_fn: Callable[[List[str]], List[List[float]]],
+    ) -> np.ndarray:
+        # Return a (len(texts), dimensions) float32 matrix. Rows are copied straight from
+        # the cache blobs and the provider's response, with no per-vector Python lists.
+        rows: Dict[str, List[int]] = {}
+        texts_by_digest: Dict[str, str] = {}
+        for row, text in enumerate(texts):
+            digest = text_digest(text)
+            rows.setdefault(digest, []).append(row)
+            texts_by_digest.setdefault(digest, text)
+
+        matrix = None
+
+        def fill(digest: str, vector) -> None:
+            nonlocal matrix
+            if matrix is None:
+                matrix = np.empty((len(texts), len(vector)), dtype=np.float32)
+            matrix[rows[digest]] = vector
+
+        found = set()
+        for digest, vector in self._rows(model, input_type, list(rows)):
+            fill(digest, vector)
+            found.add(digest)
+
+        # Embed each distinct missing text once
+        missing = [digest for digest in rows if digest not in found]
+        if missing:
+            missing_texts = [texts_by_digest[digest] for digest in missing]
+            vectors = np.asarray(embed_fn(missing_texts), dtype=np.float32)
+            self.put_many(model, input_type, missing_texts, vectors)
+            for digest, vector in zip(missing, vectors):
+                fill(digest, vector)
+
+        with self._lock:
+            self.misses += len(missing)
+            self.hits += len(texts) - len(missing)
+        return matrix if matrix is not None else np.empty((0, 0), dtype=np.float32)
+
+    def stats(self) -> str:
+        total = self.hits + self.misses
+        hit_rate = self.hits / total if total else 0.0
+        return f"embedding cache: {self.hits} hits, {self.misses} misses ({hit_rate:.1%} hit rate)"
+
+    def close(self) -> None:
+        self._conn.close()
@@ -0,0 +1,175 @@
+#
+# Weaviate Academy
+# Bounded-concurrency embedding stage for the BYO-vectors loader
+#
+# `EmbeddingPipeline.run(embed_fn, texts)` splits `texts` into batches and keeps up to
+# `max_in_flight` calls to `embed_fn` running on a thread pool. `embed_fn` has the same
+# shape as `vectorize` without its client argument, so any provider can be plugged in,
+# e.g. `functools.partial(vectorize, co)`. Results come back in input order.
+#
+# Rate limits (429) and server errors (5xx) are retried with exponential backoff, or
+# after the provider's Retry-After when it sends one. A 429 means too many requests are
+# open, so it halves the number of calls in flight (once per round of calls); the limit
+# grows back by one after each run of successful calls. The batch size is only halved
+# (and the failing batch split) when the provider says the payload is too large.
+#
+import random
+import re
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Deque, List, Optional, Sequence, Tuple
+
+from instrumentation import stage
+
+
+EmbedFn = Callable[[List[str]], List[List[float]]]
+
+
+def error_status(exc: BaseException) -> Optional[int]:
+    # Find the HTTP status code of a provider error (Cohere, OpenAI and `requests` errors)
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        response = getattr(exc, "response", None)
+        status = getattr(response, "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+# Messages providers use for a request with too many texts or tokens
+TOO_LARGE_MESSAGE = re.compile(
+    r"too large|too many (?:texts|inputs|tokens)|maximum (?:context length|batch size)",
+    re.IGNORECASE,
+)
+
+
+def is_too_large(exc: BaseException) -> bool:
+    status = error_status(exc)
+    return status == 413 or (status == 400 and TOO_LARGE_MESSAGE.search(str(exc)) is not None)
+
+
+def is_retryable(exc: BaseException) -> bool:
+    status = error_status(exc)
+    return status == 429 or (status is not None and 500 <= status < 600) or is_too_large(exc)
+
+
+def retry_after(exc: BaseException) -> Optional[float]:
+    # Seconds from the Retry-After header of the error's response, if any
+    headers = getattr(exc, "headers", None)
+    if headers is None:
+        headers = getattr(getattr(exc, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        return max(0.0, float(headers.get("Retry-After") or headers.get("retry-after")))
+    except (TypeError, ValueError):
+        return None  # HTTP-date form, or no header
+
+
+class EmbeddingPipeline:
+    def __init__(
+        self,
+        max_in_flight: int = 4,
+        batch_size: int = 50,
+        min_batch_size: int = 8,
+        max_batch_size: int = 96,  # Cohere's limit on texts per embed call
+        max_retries: int = 6,
+        backoff: float = 0.5,
+    ):
+        self.max_in_flight = max_in_flight
+        # Calls currently allowed in flight; lowered on 429s, never above `max_in_flight`
+        self.limit = max_in_flight
+        self.batch_size = batch_size
+        # Size the batches grow back to after a too-large payload shrank them
+        self.target_batch_size = min(batch_size, max_batch_size)
+        self.min_batch_size = min_batch_size
+        self.max_batch_size = max_batch_size
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.calls = 0
+        self.retries = 0
+        # `self.calls` when the limit was last lowered; 429s from calls submitted before
+        # that were caused by the old limit and don't lower it again
+        self._lowered_at = 0
+
+    def _delay(self, attempt: int) -> float:
+        # Exponential backoff with jitter, so parallel retries do not line up
+        if attempt == 0:
+            return 0.0
+        return self.backoff * (2 ** (attempt - 1)) * random.uniform(0.5, 1.5)
+
+    def _on_rate_limit(self, call: int) -> None:
+        if call > self._lowered_at:
+            self.limit = max(1, self.limit // 2)
+            self._lowered_at = self.calls
+
+    def _on_success(self, streak: int) -> int:
+        # After a run of successful calls, allow one more call in flight and grow the
+        # batch size back if a too-large payload shrank it
+        streak += 1
+        if streak >= self.limit:
+            self.limit = min(self.max_in_flight, self.limit + 1)
+            if self.batch_size < self.target_batch_size:
+                self.batch_size = min(self.target_batch_size, self.batch_size + max(1, self.batch_size // 4))
+            streak = 0
+        return streak
+
+    def run(self, embed_fn: EmbedFn, texts: Sequence[str]) -> List[List[float]]:
+        results: List[Optional[List[float]]] = [None] * len(texts)
+        # Work items are (start, end, attempt, delay); retries are scheduled before new batches
+        retry_queue: Deque[Tuple[int, int, int, float]] = deque()
+        cursor = 0
+        streak = 0
+
+        def call(start: int, end: int, attempt: int, delay: float) -> List[List[float]]:
+            time.sleep(delay)
+            with stage("embed", texts=end - start, attempt=attempt):
+                return embed_fn(list(texts[start:end]))
+
+        with ThreadPoolExecutor(max_workers=self.max_in_flight) as executor:
+            in_flight = {}
+            while cursor < len(texts) or retry_queue or in_flight:
+                # Keep the pool full
+                while len(in_flight) < self.limit and (retry_queue or cursor < len(texts)):
+                    if retry_queue:
+                        start, end, attempt, delay = retry_queue.popleft()
+                    else:
+                        start, end, attempt, delay = cursor, min(cursor + self.batch_size, len(texts)), 0, 0.0
+                        cursor = end
+                    future = executor.submit(call, start, end, attempt, delay)
+                    self.calls += 1
+                    in_flight[future] = (start, end, attempt, self.calls)
+
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    start, end, attempt, number = in_flight.pop(future)
+                    try:
+                        embeddings = future.result()
+                    except Exception as exc:
+                        if not is_retryable(exc) or attempt >= self.max_retries:
+                            raise
+                        self.retries += 1
+                        streak = 0
+                        delay = self._delay(attempt + 1)
+                        waited = retry_after(exc)
+                        if waited is not None:
+                            delay = max(delay, waited)
+                        if error_status(exc) == 429:
+                            self._on_rate_limit(number)
+                        elif is_too_large(exc):
+                            self.batch_size = max(self.min_batch_size, self.batch_size // 2)
+                            if end - start > 1:
+                                middle = start + (end - start) // 2
+                                retry_queue.append((start, middle, attempt + 1, delay))
+                                retry_queue.append((middle, end, attempt + 1, delay))
+                                continue
+                        retry_queue.append((start, end, attempt + 1, delay))
+                        continue
+
+                    if len(embeddings) != end - start:
+                        raise ValueError(
+                            f"Expected {end - start} embeddings, got {len(embeddings)}"
+                        )
+                    results[start:end] = embeddings
+                    streak = self._on_success(streak)
+
+        return results
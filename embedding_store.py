@@ -0,0 +1,40 @@
+#
+# Weaviate Academy
+# Binary embedding storage: a contiguous float32 `.npy` matrix plus an id index
+#
+# `<name>.npy` holds one row per object and `<name>.ids.npy` the matching tmdb ids.
+# Loading memory-maps the matrix, so it is effectively instant, and every row handed
+# to the batch loader is a view into the mapped file rather than a copy.
+#
+from pathlib import Path
+from typing import Dict, Sequence, Tuple
+
+import numpy as np
+
+
+def ids_path(path: Path) -> Path:
+    path = Path(path)
+    return path.with_name(path.stem + ".ids.npy")
+
+
+def save_embeddings(path: Path, ids: Sequence[int], vectors) -> None:
+    path = Path(path)
+    matrix = np.ascontiguousarray(vectors, dtype=np.float32)
+    ids = np.asarray(ids, dtype=np.int64)
+    if matrix.ndim != 2 or len(ids) != matrix.shape[0]:
+        raise ValueError(f"Expected {len(ids)} rows of vectors, got shape {matrix.shape}")
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    np.save(path, matrix)
+    np.save(ids_path(path), ids)
+
+
+def load_embeddings(path: Path) -> Tuple[np.ndarray, np.ndarray]:
+    # Return (ids, matrix), with the matrix memory-mapped read-only
+    path = Path(path)
+    return np.load(ids_path(path)), np.load(path, mmap_mode="r")
+
+
+def row_index(ids: np.ndarray) -> Dict[int, int]:
+    # Map each tmdb id to its row in the matrix
+    return {int(tmdb_id): row for row, tmdb_id in enumerate(ids.tolist())}
@@ -0,0 +1,313 @@
+#
+# Weaviate Academy
+# Export a collection to Parquet + .npy, and restore it into another cluster
+#
+# `export_collection` walks a collection with the cursor API (`iterator(after=...)`),
+# split into `parts` UUID ranges that are scanned in parallel. Each range is written in
+# chunks of `chunk_size` objects: the properties (plus the object UUID) as a Parquet
+# file and every selected vector (the default vector or named vectors such as
+# MovieNVDemo's title / overview / poster_title) as a float32 .npy file with the same
+# row order. Only one chunk per range is in memory at a time. BLOB properties (posters)
+# are left out unless `include_blobs=True`. Every chunk has the same Parquet schema,
+# taken from the collection config; nested properties (OBJECT, GEO_COORDINATES, ...)
+# are stored as JSON strings. Vectors are either the collection's single "default"
+# vector or a set of its named vectors. A manifest.json records the files, row counts,
+# vector mode and the collection configuration.
+#
+# `restore_collection` reads an export back, creates the collection from the saved
+# configuration if it does not exist, and imports the objects with their vectors
+# through the adaptive batcher, e.g. to seed a test cluster without re-vectorizing.
+#
+# Usage:
+#   python export_collection.py export MovieNVDemo --vectors title overview --parts 8
+#   python export_collection.py restore scratch/exports/MovieNVDemo [--collection Copy]
+#
+import argparse
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, is_dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+import weaviate.classes.config as wc
+import weaviate.classes.query as wq
+from tqdm import tqdm
+
+from batching import BatchConfig, ObjectBatcher
+from client_factory import close_clients, get_client
+from query_cache import bump_generation
+
+
+EXPORT_DIR = Path("scratch/exports")
+UUID_SPACE = 1 << 128
+
+DEFAULT_VECTOR = "default"
+
+# Parquet column types of the scalar and array property types; any other type (OBJECT,
+# OBJECT_ARRAY, GEO_COORDINATES, PHONE_NUMBER, ...) becomes a JSON-encoded string column
+ARROW_TYPES = {
+    wc.DataType.TEXT: pa.string(),
+    wc.DataType.TEXT_ARRAY: pa.list_(pa.string()),
+    wc.DataType.INT: pa.int64(),
+    wc.DataType.INT_ARRAY: pa.list_(pa.int64()),
+    wc.DataType.NUMBER: pa.float64(),
+    wc.DataType.NUMBER_ARRAY: pa.list_(pa.float64()),
+    wc.DataType.BOOL: pa.bool_(),
+    wc.DataType.BOOL_ARRAY: pa.list_(pa.bool_()),
+    wc.DataType.DATE: pa.timestamp("us", tz="UTC"),
+    wc.DataType.DATE_ARRAY: pa.list_(pa.timestamp("us", tz="UTC")),
+    wc.DataType.UUID: pa.string(),
+    wc.DataType.UUID_ARRAY: pa.list_(pa.string()),
+    wc.DataType.BLOB: pa.string(),  # base64, as Weaviate returns it
+}
+
+
+def uuid_ranges(parts: int) -> List[Tuple[Optional[UUID], Optional[UUID]]]:
+    # Split the UUID space into `parts` ranges of (cursor start, first UUID of next range)
+    bounds = [UUID_SPACE * part // parts for part in range(parts + 1)]
+    return [
+        (UUID(int=bounds[part] - 1) if part else None, UUID(int=bounds[part + 1]) if part < parts - 1 else None)
+        for part in range(parts)
+    ]
+
+
+def _schema(data_types: Dict[str, wc.DataType], names: List[str]) -> pa.Schema:
+    # One fixed schema for every chunk; JSON-encoded strings for the other types
+    fields = [pa.field("uuid", pa.string())]
+    fields += [pa.field(name, ARROW_TYPES.get(data_types[name], pa.string())) for name in names]
+    return pa.schema(fields)
+
+
+def _to_json(value):
+    # Nested property values: GeoCoordinate / PhoneNumber models, dates, UUIDs
+    if hasattr(value, "model_dump"):
+        return value.model_dump()
+    if is_dataclass(value) and not isinstance(value, type):
+        return asdict(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    raise TypeError(f"Cannot serialise {type(value).__name__}")
+
+
+def _column_value(value: Any, data_type: wc.DataType) -> Any:
+    if value is None:
+        return None
+    if data_type not in ARROW_TYPES:
+        return json.dumps(value, default=_to_json)
+    if data_type == wc.DataType.UUID:
+        return str(value)
+    if data_type == wc.DataType.UUID_ARRAY:
+        return [str(item) for item in value]
+    return value
+
+
+def _return_property(prop):
+    # OBJECT properties have to list their nested properties to be returned
+    if not prop.nested_properties:
+        return prop.name
+    return wq.QueryNested(name=prop.name, properties=[_return_property(nested) for nested in prop.nested_properties])
+
+
+def vector_mode(config, vectors: Sequence[str]) -> Optional[str]:
+    # "default" for the collection's single unnamed vector, "named" for named vectors
+    if not vectors:
+        return None
+    named_vectors = set(config.vector_config or {})
+    if DEFAULT_VECTOR in vectors:
+        if len(vectors) > 1:
+            raise ValueError(f"'{DEFAULT_VECTOR}' cannot be exported together with named vectors")
+        if named_vectors:
+            raise ValueError(
+                f"The collection has named vectors ({', '.join(sorted(named_vectors))}); export those by name"
+            )
+        return "default"
+    unknown = sorted(set(vectors) - named_vectors)
+    if unknown:
+        raise ValueError(f"Unknown named vectors: {', '.join(unknown)}")
+    return "named"
+
+
+class _RangeWriter:
+    # Buffers one chunk of a range and writes it out as Parquet + .npy files
+    def __init__(self, out_dir: Path, part: int, data_types: Dict[str, wc.DataType], properties: List[str],
+                 vectors: Sequence[str]):
+        self.out_dir = out_dir
+        self.part = part
+        self.data_types = {name: data_types[name] for name in properties}
+        self.schema = _schema(data_types, properties)
+        self.vectors = list(vectors)
+        self.files: List[Dict] = []
+        self._rows: List[Dict] = []
+        self._vectors: Dict[str, List] = {name: [] for name in self.vectors}
+
+    def add(self, obj) -> None:
+        row = {"uuid": str(obj.uuid)}
+        for name, data_type in self.data_types.items():
+            row[name] = _column_value(obj.properties.get(name), data_type)
+        self._rows.append(row)
+        for name in self.vectors:
+            self._vectors[name].append(obj.vector[name])
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def flush(self) -> None:
+        if not self._rows:
+            return
+        stem = f"part{self.part:03d}-{len(self.files):05d}"
+        entry = {"rows": len(self._rows), "properties": f"{stem}.parquet", "vectors": {}}
+        table = pa.Table.from_pylist(self._rows, schema=self.schema)
+        pq.write_table(table, self.out_dir / entry["properties"])
+        for name in self.vectors:
+            entry["vectors"][name] = f"{stem}.{name}.npy"
+            np.save(self.out_dir / entry["vectors"][name], np.asarray(self._vectors[name], dtype=np.float32))
+            self._vectors[name] = []
+        self._rows = []
+        self.files.append(entry)
+
+
+def export_collection(
+    collection,
+    out_dir: Optional[Path] = None,
+    properties: Optional[List[str]] = None,
+    vectors: Sequence[str] = (),
+    include_blobs: bool = False,
+    parts: int = 4,
+    chunk_size: int = 10000,
+) -> Dict:
+    # Export `collection` to `out_dir` and return the manifest
+    out_dir = Path(out_dir or EXPORT_DIR / collection.name)
+    config = collection.config.get()
+    data_types = {prop.name: prop.data_type for prop in config.properties}
+    if properties is None:
+        properties = [
+            name for name, data_type in data_types.items()
+            if include_blobs or data_type != wc.DataType.BLOB
+        ]
+    unknown = [name for name in properties if name not in data_types]
+    if unknown:
+        raise ValueError(f"{collection.name} has no properties named {', '.join(unknown)}")
+    mode = vector_mode(config, vectors)
+    return_properties = [_return_property(prop) for prop in config.properties if prop.name in properties]
+    out_dir.mkdir(parents=True, exist_ok=True)
+    total = collection.aggregate.over_all(total_count=True).total_count
+
+    progress = tqdm(total=total, desc=f"Exporting {collection.name}")
+    lock = threading.Lock()
+
+    def scan(part: int, after: Optional[UUID], stop: Optional[UUID]) -> List[Dict]:
+        writer = _RangeWriter(out_dir, part, data_types, properties, vectors)
+        objects = collection.iterator(include_vector=bool(vectors), return_properties=return_properties, after=after)
+        for obj in objects:
+            # The cursor runs in UUID order; stop at the start of the next range
+            if stop is not None and obj.uuid.int >= stop.int:
+                break
+            writer.add(obj)
+            if len(writer) >= chunk_size:
+                count = len(writer)
+                writer.flush()
+                with lock:
+                    progress.update(count)
+        count = len(writer)
+        writer.flush()
+        with lock:
+            progress.update(count)
+        return writer.files
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=parts) as executor:
+        files = list(executor.map(lambda task: scan(*task), [(part, *bounds) for part, bounds in enumerate(uuid_ranges(parts))]))
+    progress.close()
+
+    manifest = {
+        "collection": collection.name,
+        "config": config.to_dict(),
+        "properties": properties,
+        # Stored as JSON strings, decoded again by restore_collection
+        "json_properties": [name for name in properties if data_types[name] not in ARROW_TYPES],
+        "vector_mode": mode,
+        "vectors": list(vectors),
+        "rows": sum(entry["rows"] for part_files in files for entry in part_files),
+        "files": [entry for part_files in files for entry in part_files],
+    }
+    (out_dir / "manifest.json").write_text(json.dumps(manifest, indent=2, default=str))
+    print(f"Exported {manifest['rows']} objects to {out_dir} in {time.perf_counter() - start:.1f}s")
+    return manifest
+
+
+def restore_collection(
+    client, export_dir: Path, collection_name: Optional[str] = None, batching: BatchConfig = BatchConfig()
+) -> int:
+    # Import an export into `collection_name` (default: the exported collection's name)
+    export_dir = Path(export_dir)
+    manifest = json.loads((export_dir / "manifest.json").read_text())
+    collection_name = collection_name or manifest["collection"]
+    if not client.collections.exists(collection_name):
+        config = dict(manifest["config"], **{"class": collection_name})
+        client.collections.create_from_dict(config)
+    collection = client.collections.get(collection_name)
+    named = manifest["vector_mode"] == "named"
+    json_properties = manifest["json_properties"]
+
+    try:
+        with ObjectBatcher(collection, batching) as batch, tqdm(total=manifest["rows"], desc=f"Restoring {collection_name}") as progress:
+            for entry in manifest["files"]:
+                rows = pq.read_table(export_dir / entry["properties"]).to_pylist()
+                vectors = {name: np.load(export_dir / path, mmap_mode="r") for name, path in entry["vectors"].items()}
+                for index, row in enumerate(rows):
+                    uuid = row.pop("uuid")
+                    for name in json_properties:
+                        if row[name] is not None:
+                            row[name] = json.loads(row[name])
+                    properties = {key: value for key, value in row.items() if value is not None}
+                    vector = None
+                    if vectors and named:
+                        vector = {name: matrix[index].tolist() for name, matrix in vectors.items()}
+                    elif vectors:
+                        vector = vectors[DEFAULT_VECTOR][index].tolist()
+                    batch.add_object(properties, uuid, vector=vector)
+                progress.update(len(rows))
+    finally:
+        bump_generation(collection_name)
+
+    print(f"Restored {batch.imported} objects into {collection_name} ({len(batch.failed)} failed)")
+    return batch.imported
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    commands = parser.add_subparsers(dest="command", required=True)
+    export_args = commands.add_parser("export")
+    export_args.add_argument("collection")
+    export_args.add_argument("--out")
+    export_args.add_argument("--properties", nargs="+")
+    export_args.add_argument("--vectors", nargs="+", default=[], help="Named vectors to export, or 'default' for the unnamed vector")
+    export_args.add_argument("--include-blobs", action="store_true")
+    export_args.add_argument("--parts", type=int, default=4)
+    export_args.add_argument("--chunk-size", type=int, default=10000)
+    restore_args = commands.add_parser("restore")
+    restore_args.add_argument("export_dir")
+    restore_args.add_argument("--collection")
+    args = parser.parse_args()
+
+    client = get_client({"X-OpenAI-Api-Key": os.getenv("OPENAI_API_KEY")})
+    try:
+        if args.command == "export":
+            export_collection(
+                client.collections.get(args.collection), args.out, args.properties, args.vectors,
+                args.include_blobs, args.parts, args.chunk_size,
+            )
+        else:
+            restore_collection(client, args.export_dir, args.collection)
+    finally:
+        close_clients()
@@ -0,0 +1,94 @@
+#
+# Weaviate Academy
+# Deterministic stand-in for the text2vec-transformers and multi2vec-clip inference APIs
+#
+# Used by docker-compose-bench.yaml so the import benchmark (bench_import.py) can run
+# against a real Weaviate without OpenAI, Cohere or a CLIP model. The vectors are
+# derived from a SHA-256 of the input, so the same text or image always gets the same
+# vector. Only the standard library is used, so it runs on a plain python image.
+#
+# Endpoints:
+#   GET  /.well-known/live, /.well-known/ready, /meta
+#   POST /vectors    {"text": ...}                 -> {"text", "vector", "dim"}   (text2vec-transformers)
+#   POST /vectorize  {"texts": [...], "images": [...]} -> {"textVectors", "imageVectors"}  (multi2vec-clip)
+#
+# Usage: python fake_vectorizer.py [--port 8080] [--dim 384] [--clip-dim 512] [--delay-ms 0]
+#
+import argparse
+import hashlib
+import json
+import math
+import random
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List
+
+
+def fake_vector(payload: str, dim: int) -> List[float]:
+    # Unit-length pseudo-random vector seeded by the input
+    rng = random.Random(hashlib.sha256(payload.encode("utf-8")).digest())
+    vector = [rng.gauss(0.0, 1.0) for _ in range(dim)]
+    norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+    return [value / norm for value in vector]
+
+
+class FakeVectorizerHandler(BaseHTTPRequestHandler):
+    text_dim = 384
+    clip_dim = 512
+    delay = 0.0  # Seconds of simulated inference latency per request
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status: int, body=None) -> None:
+        data = json.dumps(body).encode("utf-8") if body is not None else b""
+        self.send_response(status)
+        if body is not None:
+            self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path.startswith("/.well-known/"):
+            self._reply(204)
+        elif self.path.startswith("/meta"):
+            self._reply(200, {"model": {"name": "fake-vectorizer", "dim": self.text_dim, "clip_dim": self.clip_dim}})
+        else:
+            self._reply(404, {"error": f"unknown path {self.path}"})
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        if self.delay:
+            time.sleep(self.delay)
+        path = self.path.rstrip("/")
+        if path == "/vectors":
+            text = body.get("text", "")
+            self._reply(200, {"text": text, "vector": fake_vector(text, self.text_dim), "dim": self.text_dim})
+        elif path == "/vectorize":
+            self._reply(200, {
+                "textVectors": [fake_vector(text, self.clip_dim) for text in body.get("texts") or []],
+                "imageVectors": [fake_vector(image, self.clip_dim) for image in body.get("images") or []],
+            })
+        else:
+            self._reply(404, {"error": f"unknown path {self.path}"})
+
+
+def serve(port: int = 8080, dim: int = 384, clip_dim: int = 512, delay_ms: float = 0.0) -> ThreadingHTTPServer:
+    FakeVectorizerHandler.text_dim = dim
+    FakeVectorizerHandler.clip_dim = clip_dim
+    FakeVectorizerHandler.delay = delay_ms / 1000
+    return ThreadingHTTPServer(("0.0.0.0", port), FakeVectorizerHandler)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--clip-dim", type=int, default=512)
+    parser.add_argument("--delay-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = serve(args.port, args.dim, args.clip_dim, args.delay_ms)
+    print(f"Fake vectorizer listening on :{args.port}")
+    server.serve_forever()
@@ -0,0 +1,164 @@
+#
+# Weaviate Academy
+# Client-side hybrid fusion over cached BM25 and vector candidates
+#
+# `movies.query.hybrid(...)` fuses a keyword and a vector search on the server. For an
+# alpha sweep that means one round trip per alpha. `HybridCandidates` instead fetches
+# the BM25 and vector candidate lists once (through the query_cache result cache, so
+# repeats are free until the collection changes) and recomputes the fusion locally for
+# any `alpha` / `limit` with NumPy:
+#
+#   candidates = HybridCandidates(movies, "history", candidates=100)
+#   for alpha in (0.0, 0.25, 0.5, 0.75, 1.0):
+#       objects = candidates.fuse(alpha=alpha, limit=5)   # same shape as response.objects
+#
+# As in Weaviate, `alpha=1` is a pure vector search and `alpha=0` pure BM25.
+# "ranked" fusion scores every object by sum(weight / (60 + rank)) over the lists it
+# appears in; "relative_score" fusion min-max normalises the BM25 scores and the vector
+# distances of each list to [0, 1] and takes the weighted sum. Objects found by only one
+# search get nothing from the other. Results only match the server's for objects inside
+# the fetched candidate window, so keep `candidates` well above the largest `limit`.
+#
+import argparse
+import os
+from dataclasses import replace
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+import weaviate.classes.query as wq
+
+from client_factory import close_clients, get_client
+from query_cache import cached
+
+
+FUSION_TYPES = ("relative_score", "ranked")
+RANK_CONSTANT = 60  # Weaviate's ranked fusion constant
+
+
+def _normalize(values: np.ndarray, present: np.ndarray) -> np.ndarray:
+    # Min-max normalise the present entries to [0, 1]; a list of equal scores maps to 1
+    result = np.zeros(len(values))
+    if not present.any():
+        return result
+    low, high = values[present].min(), values[present].max()
+    result[present] = (values[present] - low) / (high - low) if high > low else 1.0
+    return result
+
+
+class HybridCandidates:
+    def __init__(
+        self,
+        collection,
+        query: str,
+        vector: Optional[Sequence[float]] = None,
+        target_vector: Optional[str] = None,
+        query_properties: Optional[List[str]] = None,
+        filters=None,
+        candidates: int = 100,
+        return_properties: Optional[List[str]] = None,
+    ):
+        movies = cached(collection)
+        common = dict(filters=filters, limit=candidates, return_properties=return_properties)
+
+        keyword = movies.query.bm25(
+            query=query,
+            query_properties=query_properties,
+            return_metadata=wq.MetadataQuery(score=True),
+            **common,
+        ).objects
+        if vector is not None:
+            semantic = movies.query.near_vector(
+                near_vector=vector,
+                target_vector=target_vector,
+                return_metadata=wq.MetadataQuery(distance=True),
+                **common,
+            ).objects
+        else:
+            semantic = movies.query.near_text(
+                query=query,
+                target_vector=target_vector,
+                return_metadata=wq.MetadataQuery(distance=True),
+                **common,
+            ).objects
+
+        # Union of both lists; one column per candidate object
+        self.objects: List = []
+        index: Dict = {}
+        for obj in list(semantic) + list(keyword):
+            if obj.uuid not in index:
+                index[obj.uuid] = len(self.objects)
+                self.objects.append(obj)
+        size = len(self.objects)
+
+        self.keyword_rank = np.full(size, -1)
+        self.keyword_score = np.zeros(size)
+        for rank, obj in enumerate(keyword):
+            self.keyword_rank[index[obj.uuid]] = rank
+            self.keyword_score[index[obj.uuid]] = obj.metadata.score or 0.0
+
+        self.vector_rank = np.full(size, -1)
+        self.vector_distance = np.zeros(size)
+        for rank, obj in enumerate(semantic):
+            self.vector_rank[index[obj.uuid]] = rank
+            self.vector_distance[index[obj.uuid]] = obj.metadata.distance or 0.0
+
+    def scores(self, alpha: float = 0.75, fusion: str = "relative_score") -> np.ndarray:
+        in_keyword = self.keyword_rank >= 0
+        in_vector = self.vector_rank >= 0
+        if fusion == "ranked":
+            keyword = np.where(in_keyword, 1.0 / (RANK_CONSTANT + self.keyword_rank), 0.0)
+            semantic = np.where(in_vector, 1.0 / (RANK_CONSTANT + self.vector_rank), 0.0)
+        elif fusion == "relative_score":
+            keyword = _normalize(self.keyword_score, in_keyword)
+            # Smaller distances are better
+            semantic = _normalize(-self.vector_distance, in_vector)
+        else:
+            raise ValueError(f"Unknown fusion type {fusion!r}; choose from {', '.join(FUSION_TYPES)}")
+        return alpha * semantic + (1 - alpha) * keyword
+
+    def fuse(self, alpha: float = 0.75, limit: int = 10, fusion: str = "relative_score") -> List:
+        # Top `limit` objects with `metadata.score` set to the fused score
+        scores = self.scores(alpha, fusion)
+        order = np.argsort(-scores, kind="stable")[:limit]
+        return [
+            replace(
+                self.objects[i],
+                metadata=replace(
+                    self.objects[i].metadata,
+                    score=float(scores[i]),
+                    explain_score=(
+                        f"{fusion} fusion, alpha {alpha}: keyword rank {self.keyword_rank[i]}, "
+                        f"vector rank {self.vector_rank[i]} (-1 = not found)"
+                    ),
+                ),
+            )
+            for i in order
+        ]
+
+    def sweep(
+        self, alphas: Iterable[float], limit: int = 10, fusion: str = "relative_score"
+    ) -> Dict[float, List]:
+        return {alpha: self.fuse(alpha, limit, fusion) for alpha in alphas}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Alpha sweep over one fetch of hybrid candidates")
+    parser.add_argument("collection")
+    parser.add_argument("query")
+    parser.add_argument("--alphas", type=float, nargs="+", default=[0.0, 0.25, 0.5, 0.75, 1.0])
+    parser.add_argument("--limit", type=int, default=5)
+    parser.add_argument("--fusion", choices=FUSION_TYPES, default="relative_score")
+    parser.add_argument("--target-vector")
+    args = parser.parse_args()
+
+    client = get_client({"X-OpenAI-Api-Key": os.getenv("OPENAI_API_KEY")})
+    try:
+        candidates = HybridCandidates(
+            client.collections.get(args.collection), args.query, target_vector=args.target_vector
+        )
+        for alpha, objects in candidates.sweep(args.alphas, args.limit, args.fusion).items():
+            print(f"alpha={alpha}")
+            for o in objects:
+                print(f"  {o.metadata.score:.3f}  {o.properties.get('title')}")
+    finally:
+        close_clients()
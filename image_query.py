@@ -0,0 +1,87 @@
+#
+# Weaviate Academy
+# Shared preprocessing for image queries
+#
+# `url_to_base64(url)` replaces the per-script helpers that downloaded the whole image
+# (with no timeout) and base64-encoded it on every call. The download goes through
+# dataset_cache.fetch, so it is streamed to disk, revalidated with ETags and reused
+# across runs. The image is then downsized so its shortest side matches the CLIP input
+# resolution (multi2vec-clip resizes to 224 pixels anyway), and the resulting base64
+# string is cached next to the download, keyed by the image digest and target size.
+# Within a process the string is also kept in memory for `max_age` seconds, so repeated
+# queries with the same image make no request at all (not even a conditional GET).
+#
+import base64
+import io
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Tuple
+
+from PIL import Image
+
+from dataset_cache import CACHE_DIR, OFFLINE, fetch
+
+
+CLIP_SIZE = 224  # Shortest side of the CLIP ViT input
+JPEG_QUALITY = 90
+
+# (url, size, cache dir) -> (time fetched, base64 string)
+_encoded: Dict[Tuple[str, int, str], Tuple[float, str]] = {}
+_encoded_lock = threading.Lock()
+
+
+def downsize(data: bytes, size: int = CLIP_SIZE, quality: int = JPEG_QUALITY) -> bytes:
+    # Return the image scaled so its shortest side is `size` pixels, as JPEG.
+    # Images that are already small enough are returned unchanged.
+    with Image.open(io.BytesIO(data)) as image:
+        width, height = image.size
+        scale = size / min(width, height)
+        if scale >= 1:
+            return data
+        resized = image.convert("RGB").resize(
+            (max(1, round(width * scale)), max(1, round(height * scale))),
+            Image.Resampling.BICUBIC,  # CLIP's own preprocessing uses bicubic resampling
+        )
+    buffer = io.BytesIO()
+    resized.save(buffer, format="JPEG", quality=quality)
+    return buffer.getvalue()
+
+
+def image_to_base64(data: bytes, size: int = CLIP_SIZE) -> str:
+    return base64.b64encode(downsize(data, size)).decode("utf-8")
+
+
+def url_to_base64(
+    url: str,
+    size: int = CLIP_SIZE,
+    cache_dir: Path = CACHE_DIR,
+    offline: bool = OFFLINE,
+    timeout: float = 30.0,
+    max_age: float = 600.0,
+) -> str:
+    # Base64 of the downsized image at `url`, ready to pass as `near_image`. The server
+    # is only asked again once the in-memory copy is older than `max_age` seconds.
+    key = (url, size, str(cache_dir))
+    with _encoded_lock:
+        entry = _encoded.get(key)
+    if entry is not None and time.monotonic() - entry[0] < max_age:
+        return entry[1]
+
+    fetched_at = time.monotonic()
+    source = fetch(url, cache_dir=cache_dir, offline=offline, timeout=timeout)
+    # The cached download is named after its SHA-256 digest
+    encoded_path = Path(cache_dir) / "image_b64" / f"{source.name}-{size}.b64"
+    if encoded_path.exists():
+        encoded = encoded_path.read_text()
+    else:
+        encoded = image_to_base64(source.read_bytes(), size)
+        encoded_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = encoded_path.with_name(encoded_path.name + ".tmp")
+        tmp_path.write_text(encoded)
+        os.replace(tmp_path, encoded_path)
+
+    with _encoded_lock:
+        _encoded[key] = (fetched_at, encoded)
+    return encoded
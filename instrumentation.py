@@ -0,0 +1,188 @@
+#
+# Weaviate Academy
+# Lightweight timers, counters and optional OpenTelemetry spans
+#
+# Set WEAVIATE_INSTRUMENT=1 to time each stage of the loaders (fetch, JSON decode,
+# transform, poster read/encode, embedding calls, batch sends) and every query the
+# scripts run. At exit, totals per stage and counter go to a JSON file under
+# scratch/metrics (WEAVIATE_INSTRUMENT_DIR), one file per process, so the loader's
+# worker processes report too. Time spent in server-side vectorization is part of
+# `batch_send`, since the insert request returns only once the objects are vectorized.
+#
+# With WEAVIATE_OTEL=1 (and `opentelemetry-api` installed, plus an SDK / exporter
+# configured the usual way, e.g. `opentelemetry-instrument`), every stage is also
+# emitted as a span.
+#
+# When disabled, `stage()` returns a shared no-op context manager and `instrumented()`
+# returns the collection unchanged, so the cost is one flag check per call.
+#
+import atexit
+import contextlib
+import json
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+
+METRICS_DIR = Path(os.getenv("WEAVIATE_INSTRUMENT_DIR", "scratch/metrics"))
+
+_enabled = False
+_tracer = None
+_lock = threading.Lock()
+# Stage name -> [count, errors, total seconds, max seconds]
+_stages: Dict[str, list] = {}
+_counters: Dict[str, float] = {}
+_started = time.time()
+_NOOP = contextlib.nullcontext()
+
+
+def enable(otel: bool = False) -> None:
+    global _enabled, _tracer
+    if _enabled:
+        return
+    _enabled = True
+    if otel:
+        try:
+            from opentelemetry import trace
+        except ImportError:
+            print("WEAVIATE_OTEL is set but opentelemetry-api is not installed; recording timings only")
+        else:
+            _tracer = trace.get_tracer("weaviate-academy")
+    atexit.register(export_json)
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def _record(name: str, elapsed: float, failed: bool) -> None:
+    with _lock:
+        entry = _stages.get(name)
+        if entry is None:
+            entry = _stages[name] = [0, 0, 0.0, 0.0]
+        entry[0] += 1
+        entry[1] += failed
+        entry[2] += elapsed
+        entry[3] = max(entry[3], elapsed)
+
+
+class _Stage:
+    __slots__ = ("name", "attributes", "start", "span")
+
+    def __init__(self, name: str, attributes: Dict[str, Any]):
+        self.name = name
+        self.attributes = attributes
+        self.span = None
+
+    def __enter__(self) -> "_Stage":
+        if _tracer is not None:
+            attributes = {key: value for key, value in self.attributes.items() if value is not None}
+            self.span = _tracer.start_as_current_span(self.name, attributes=attributes)
+            self.span.__enter__()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        _record(self.name, time.perf_counter() - self.start, exc_type is not None)
+        if self.span is not None:
+            self.span.__exit__(exc_type, exc, tb)
+
+
+def stage(name: str, **attributes):
+    # Time the enclosed block as `name`; attributes are attached to the span
+    if not _enabled:
+        return _NOOP
+    return _Stage(name, attributes)
+
+
+def count(name: str, value: float = 1) -> None:
+    if not _enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+
+def reset() -> None:
+    # Drop everything recorded so far, e.g. between the runs of a benchmark
+    with _lock:
+        _stages.clear()
+        _counters.clear()
+
+
+def summary() -> Dict[str, Any]:
+    with _lock:
+        stages = {
+            name: {
+                "count": calls,
+                "errors": errors,
+                "total_s": round(total, 6),
+                "mean_ms": round(1000 * total / calls, 3),
+                "max_ms": round(1000 * longest, 3),
+            }
+            for name, (calls, errors, total, longest) in sorted(_stages.items())
+        }
+        return {
+            "script": os.path.basename(sys.argv[0]),
+            "pid": os.getpid(),
+            "started": _started,
+            "elapsed_s": round(time.time() - _started, 3),
+            "stages": stages,
+            "counters": dict(sorted(_counters.items())),
+        }
+
+
+def export_json(path: Optional[Path] = None) -> Optional[Path]:
+    if not _stages and not _counters:
+        return None
+    if path is None:
+        script = Path(sys.argv[0]).stem.lstrip("-") or "python"
+        path = METRICS_DIR / f"{script}-{int(_started)}-{os.getpid()}.json"
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(summary(), indent=2))
+    return path
+
+
+class _InstrumentedNamespace:
+    # Times every call made through `collection.query` / `collection.generate`
+    def __init__(self, namespace, prefix: str, collection_name: str):
+        self._namespace = namespace
+        self._prefix = prefix
+        self._collection_name = collection_name
+
+    def __getattr__(self, name: str):
+        method = getattr(self._namespace, name)
+        if not callable(method):
+            return method
+
+        def timed(*args, **kwargs):
+            target = kwargs.get("target_vector")
+            label = f"{self._prefix}.{name}" + (f"[{target}]" if isinstance(target, str) else "")
+            with stage(label, collection=self._collection_name, target_vector=str(target) if target else None):
+                return method(*args, **kwargs)
+
+        return timed
+
+
+class InstrumentedCollection:
+    def __init__(self, collection):
+        self._collection = collection
+        self.query = _InstrumentedNamespace(collection.query, "query", collection.name)
+        self.generate = _InstrumentedNamespace(collection.generate, "generate", collection.name)
+
+    def __getattr__(self, name: str):
+        return getattr(self._collection, name)
+
+
+def instrumented(collection):
+    # Wrap a collection so each query is timed; a no-op when instrumentation is off
+    if not _enabled:
+        return collection
+    return InstrumentedCollection(collection)
+
+
+if os.getenv("WEAVIATE_INSTRUMENT") == "1":
+    enable(otel=os.getenv("WEAVIATE_OTEL") == "1")
@@ -0,0 +1,51 @@
+#
+# Weaviate Academy
+# Shared movie-record transform used by the loader scripts
+#
+import json
+from typing import Dict, Iterator, List
+
+import pandas as pd
+
+from instrumentation import stage
+
+
+# Number of rows converted per chunk. Large enough to amortise the pandas
+# overhead, small enough to keep the property dicts of one chunk in memory.
+DEFAULT_CHUNK_SIZE = 5000
+
+
+def parse_release_dates(release_dates: pd.Series) -> List:
+    # Convert the whole column of JSON dates to time zone aware `datetime`s at once
+    parsed = pd.to_datetime(release_dates.to_numpy(), format="%Y-%m-%d", utc=True)
+    return parsed.to_pydatetime().tolist()
+
+
+def parse_genre_ids(genre_ids: pd.Series) -> List[List[int]]:
+    # Each cell holds a JSON array such as "[18, 10749]". Joining the cells into one
+    # JSON document lets a single `json.loads` call decode the whole column.
+    return json.loads("[" + ",".join(genre_ids) + "]")
+
+
+def movie_records(
+    df: pd.DataFrame, chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Iterator[List[Dict]]:
+    # Yield lists of ready-made `Movie` property dicts, `chunk_size` rows at a time
+    for start in range(0, len(df), chunk_size):
+        chunk = df.iloc[start:start + chunk_size]
+
+        with stage("transform", rows=len(chunk)):
+            # Convert data types column by column
+            columns = {
+                "title": chunk["title"].tolist(),
+                "overview": chunk["overview"].tolist(),
+                "vote_average": chunk["vote_average"].tolist(),
+                "genre_ids": parse_genre_ids(chunk["genre_ids"]),
+                "release_date": parse_release_dates(chunk["release_date"]),
+                "tmdb_id": chunk["id"].tolist(),
+            }
+
+            # Build the object payloads
+            names = list(columns)
+            records = [dict(zip(names, values)) for values in zip(*columns.values())]
+        yield records
@@ -0,0 +1,290 @@
+#
+# Weaviate Academy
+# Shared loader entry point: transform movie rows and write them to a collection
+#
+# `load_movies(...)` writes a DataFrame of movies into an existing collection. With
+# `workers > 1` the rows are split into shards by object UUID, and every shard is
+# transformed and written by its own Python process with its own client connection,
+# so CPU-bound work (date parsing, JSON, base64) is no longer capped at one core.
+# Failed objects from all shards are collected into a single report. Batch sizing is
+# controlled by a `BatchConfig` (see batching.py) passed as `batching=`.
+#
+# With `incremental=True` the loader keeps the existing collection and only writes the
+# movies whose content changed since the last load, using the manifest in
+# sync_manifest.py; movies that disappeared from the dataset are deleted. Every
+# acknowledged batch is journaled (checkpoint.py), and `resume=True` continues an
+# interrupted import from the last committed batch. Objects that still fail after the
+# batcher's retries are written to a dead-letter queue (dead_letter.py); each import
+# starts a fresh queue, since it sends every object that is not stored yet.
+#
+# With `poster_options=PosterOptions(...)` posters are resized and re-encoded on a process
+# pool before the import (poster_resize.py), which shrinks the batches and the stored
+# BLOBs; the loader reports the poster bytes saved and the ingest throughput.
+#
+# Every load bumps the collection's generation stamp (query_cache.py), so cached query
+# results for it are discarded once new data has been written.
+#
+# Worker processes are started as `python movie_loader.py <task file>` rather than
+# through `multiprocessing`, because the course scripts cannot be re-imported safely
+# by a spawned interpreter.
+#
+import os
+import pickle
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+
+import pandas as pd
+import weaviate
+import weaviate.classes.query as wq
+from tqdm import tqdm
+from weaviate.util import generate_uuid5
+
+from batching import BatchConfig, ObjectBatcher
+from checkpoint import CheckpointJournal, acknowledged_uuids, clear_checkpoint
+from dead_letter import DeadLetterQueue, clear_dead_letters
+from embedding_store import load_embeddings, row_index
+from instrumentation import stage
+from movie_data import movie_records
+from poster_resize import PosterOptions, prepare_posters, resize_poster
+from poster_stream import iter_posters_b64, poster_crcs
+from query_cache import bump_generation
+from sync_manifest import load_manifest, plan_sync, save_manifest
+
+
+class LoadReport(NamedTuple):
+    imported: int
+    failed: List[Dict]  # One {"uuid": ..., "message": ...} dict per failed object
+
+    def merge(self, other: "LoadReport") -> "LoadReport":
+        return LoadReport(self.imported + other.imported, self.failed + other.failed)
+
+    def print_summary(self) -> None:
+        # Check for failed objects
+        print(f"Imported {self.imported} objects")
+        if len(self.failed) > 0:
+            print(f"Failed to import {len(self.failed)} objects")
+            print(f"e.g. Failed to import object with error: {self.failed[0]['message']}")
+            print("Failed objects were written to scratch/dead_letter; replay them with dead_letter.py")
+
+
+def shard_of(uuid: str, shards: int) -> int:
+    return int(str(uuid).replace("-", ""), 16) % shards
+
+
+def split_shards(df: pd.DataFrame, shards: int) -> List[pd.DataFrame]:
+    # Split the rows by their (deterministic) object UUID
+    shard_ids = df["id"].map(lambda tmdb_id: shard_of(generate_uuid5(tmdb_id), shards))
+    return [df[shard_ids == shard] for shard in range(shards)]
+
+
+def load_shard(
+    collection_name: str,
+    df: pd.DataFrame,
+    headers: Optional[Dict[str, str]] = None,
+    posters_path: Optional[Path] = None,
+    vectors_path: Optional[Path] = None,
+    poster_options: Optional[PosterOptions] = None,
+    batching: BatchConfig = BatchConfig(),
+    position: int = 0,
+) -> LoadReport:
+    # Transform and write one shard of rows over a connection of its own
+    client = weaviate.connect_to_local(headers=headers)
+    try:
+        collection = client.collections.get(collection_name)
+
+        # Optional inputs: posters streamed from the zip (optionally resized), precomputed vectors
+        posters = None
+        if posters_path:
+            resize = partial(resize_poster, options=poster_options) if poster_options else None
+            posters = iter_posters_b64(posters_path, df["id"].tolist(), transform=resize)
+        if vectors_path:
+            emb_ids, emb_matrix = load_embeddings(vectors_path)
+            emb_rows = row_index(emb_ids)
+
+        # Enter context manager; acknowledged batches are journaled so a crash can resume
+        # Objects that cannot be imported, even after retries, go to a dead-letter queue
+        with CheckpointJournal(collection_name, shard=position) as journal, \
+                DeadLetterQueue(collection_name, shard=position) as dead_letters, \
+                ObjectBatcher(collection, batching, journal=journal, dead_letters=dead_letters) as batch:
+            with tqdm(total=len(df), position=position) as progress:
+                for movie_objs in movie_records(df):
+                    for movie_obj in movie_objs:
+                        if posters is not None:
+                            movie_obj["poster"] = next(posters)
+                        vector = emb_matrix[emb_rows[movie_obj["tmdb_id"]]] if vectors_path else None
+
+                        # Add object to batch queue
+                        batch.add_object(
+                            properties=movie_obj,
+                            uuid=generate_uuid5(movie_obj["tmdb_id"]),
+                            vector=vector,
+                        )
+                        # Batcher sends batches sized by latency and payload bytes
+                    progress.update(len(movie_objs))
+
+        if batch.retried:
+            print(f"Retried {batch.retried} objects after transient errors")
+        return LoadReport(batch.imported, batch.failed)
+    finally:
+        client.close()
+
+
+def _run_worker(task: Dict, workdir: Path) -> LoadReport:
+    # Hand one shard to a fresh interpreter and read its report back
+    shard = task["position"]
+    task_path = workdir / f"shard-{shard}.task"
+    report_path = workdir / f"shard-{shard}.report"
+    task_path.write_bytes(pickle.dumps(task))
+    subprocess.run([sys.executable, str(Path(__file__).resolve()), str(task_path)], check=True)
+    return LoadReport(**pickle.loads(report_path.read_bytes()))
+
+
+def _load_rows(
+    collection_name: str,
+    df: pd.DataFrame,
+    headers: Optional[Dict[str, str]],
+    workers: int,
+    **options,
+) -> LoadReport:
+    if workers <= 1 or len(df) == 0:
+        return load_shard(collection_name, df, headers=headers, **options)
+
+    print(f"Loading {len(df)} objects with {workers} worker processes")
+    with tempfile.TemporaryDirectory(prefix="movie_loader_") as workdir:
+        tasks = [
+            dict(collection_name=collection_name, df=shard_df, headers=headers, position=shard, **options)
+            for shard, shard_df in enumerate(split_shards(df, workers))
+        ]
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            reports = list(executor.map(lambda task: _run_worker(task, Path(workdir)), tasks))
+
+    report = LoadReport(0, [])
+    for shard_report in reports:
+        report = report.merge(shard_report)
+    return report
+
+
+def _stored_uuids(collection) -> Set[str]:
+    # Every object UUID in the collection; no properties or vectors are fetched
+    return {str(obj.uuid) for obj in collection.iterator(include_vector=False, return_properties=[])}
+
+
+def _sync_collection(
+    collection_name: str, headers: Optional[Dict[str, str]], manifest: Dict[str, str], current: Set[str]
+) -> Tuple[Dict[str, str], List[str]]:
+    # Delete the objects that are no longer in the dataset (`current`) and return the
+    # manifest entries that can be trusted, plus the UUIDs that were deleted. If the
+    # manifest does not match the collection (an interrupted load, objects written by
+    # another script) the plan is rebuilt from the UUIDs that are actually stored.
+    client = weaviate.connect_to_local(headers=headers)
+    try:
+        collection = client.collections.get(collection_name)
+        total = collection.aggregate.over_all(total_count=True).total_count
+        if total == len(manifest):
+            stale = [uuid for uuid in manifest if uuid not in current]
+        else:
+            print(f"Manifest lists {len(manifest)} objects but {collection_name} has {total}; listing stored objects.")
+            stored = _stored_uuids(collection)
+            # Objects missing from the collection are re-sent; stored objects with no hash too
+            manifest = {uuid: content_hash for uuid, content_hash in manifest.items() if uuid in stored}
+            stale = sorted(stored - current)
+
+        deleted, failed = [], []
+        for start in range(0, len(stale), 1000):
+            result = collection.data.delete_many(
+                where=wq.Filter.by_id().contains_any(stale[start:start + 1000]), verbose=True
+            )
+            for obj in result.objects:
+                (deleted if obj.successful else failed).append(str(obj.uuid))
+        if failed:
+            # They stay in the collection, so the next sync sees the mismatch and retries them
+            print(f"Failed to delete {len(failed)} objects, e.g. {failed[0]}")
+        return manifest, deleted
+    finally:
+        client.close()
+
+
+def load_movies(
+    collection_name: str,
+    df: pd.DataFrame,
+    headers: Optional[Dict[str, str]] = None,
+    workers: int = int(os.getenv("WEAVIATE_LOADER_WORKERS", "1")),
+    incremental: bool = False,
+    resume: bool = False,
+    **options,
+) -> LoadReport:
+    # Write the rows of `df` to `collection_name`; see `load_shard` for the options.
+    # With `incremental=True` only rows whose content hash differs from the manifest are
+    # written, and objects no longer in `df` are deleted. With `resume=True` the objects
+    # acknowledged by an interrupted earlier run (see checkpoint.py) are skipped.
+    posters_path = options.get("posters_path")
+    poster_options = options.get("poster_options")
+    checksums = poster_crcs(posters_path) if posters_path else None
+    if checksums and poster_options:
+        # Resized posters differ from the originals; changing the options re-imports them
+        suffix = f":{poster_options.size}:{poster_options.quality}"
+        checksums = {tmdb_id: f"{crc}{suffix}" for tmdb_id, crc in checksums.items()}
+    manifest, deleted = {}, []
+    if incremental:
+        current = set(df["id"].map(generate_uuid5))
+        manifest, deleted = _sync_collection(collection_name, headers, load_manifest(collection_name), current)
+    load_df, _, new_manifest = plan_sync(df, manifest, checksums)
+    if incremental:
+        print(
+            f"Incremental sync: {len(load_df)} new or changed, {len(deleted)} deleted, "
+            f"{len(df) - len(load_df)} unchanged"
+        )
+
+    if resume:
+        acknowledged = acknowledged_uuids(collection_name)
+        done = load_df["id"].map(generate_uuid5).isin(acknowledged)
+        print(f"Resuming import: {done.sum()} objects already stored, {(~done).sum()} to go")
+        load_df = load_df[~done]
+    else:
+        clear_checkpoint(collection_name)
+    # Objects dead-lettered by an earlier run are not acknowledged, so they are sent again
+    clear_dead_letters(collection_name)
+
+    if posters_path and poster_options and len(load_df):
+        with stage("poster_prepare", posters=len(load_df)):
+            stats = prepare_posters(posters_path, load_df["id"].tolist(), poster_options)
+        stats.print_summary()
+
+    start = time.perf_counter()
+    try:
+        report = _load_rows(collection_name, load_df, headers, workers, **options)
+    finally:
+        # Even a partial import changes what queries return
+        bump_generation(collection_name)
+    elapsed = time.perf_counter() - start
+    if report.imported:
+        print(f"Ingested {report.imported} objects in {elapsed:.1f}s ({report.imported / elapsed:.0f} objects/s)")
+    # The import ran to completion, so there is nothing left to resume
+    clear_checkpoint(collection_name)
+
+    # Failed objects keep their previous hash (if any), so the next sync retries them; the
+    # new hash is pending until `replay_dead_letters` stores them
+    pending = {}
+    for failed in report.failed:
+        pending[failed["uuid"]] = new_manifest[failed["uuid"]]
+        if failed["uuid"] in manifest:
+            new_manifest[failed["uuid"]] = manifest[failed["uuid"]]
+        else:
+            new_manifest.pop(failed["uuid"], None)
+    save_manifest(collection_name, new_manifest, pending)
+    return report
+
+
+if __name__ == "__main__":
+    # Worker process: load the shard described by the task file
+    task_path = Path(sys.argv[1])
+    task = pickle.loads(task_path.read_bytes())
+    report = load_shard(**task)
+    # Pickle a plain dict: this module runs as `__main__` here, but not in the parent
+    task_path.with_suffix(".report").write_bytes(pickle.dumps(report._asdict()))
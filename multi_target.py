@@ -0,0 +1,58 @@
+#
+# Weaviate Academy
+# Search several named vectors in one query
+#
+# `combine(...)` builds the `target_vector=` argument for a query over several named
+# vectors of a collection such as MovieNVDemo (title, overview, poster_title). Weaviate
+# runs the search on every target vector, merges the candidates by UUID and combines
+# their distances on the server, so one call replaces a query per vector plus merging
+# the results in Python:
+#
+#   movies.query.near_text(
+#       query="A joyful holiday film",
+#       target_vector=combine({"title": 0.7, "overview": 0.3}, "sum"),
+#       limit=5,
+#   )
+#
+# Methods:
+#   minimum         - the smallest distance over the targets (weights not allowed)
+#   sum             - sum of the distances, weighted if weights are given
+#   average         - mean of the distances, weighted if weights are given
+#   relative_score  - each target's distances min-max normalised, then weighted (needs weights)
+#
+# All targets must be able to vectorize the query: a near_image query, for example, can
+# only combine multi2vec vectors such as poster_title.
+#
+from typing import Dict, Sequence, Union
+
+import weaviate.classes.query as wq
+
+
+COMBINATION_METHODS = ("minimum", "sum", "average", "relative_score")
+
+Targets = Union[Sequence[str], Dict[str, float]]
+
+
+def combine(targets: Targets, method: str = "minimum"):
+    if method not in COMBINATION_METHODS:
+        raise ValueError(f"Unknown combination method {method!r}; choose from {', '.join(COMBINATION_METHODS)}")
+    if not targets:
+        raise ValueError("At least one target vector is required")
+
+    if not isinstance(targets, dict):
+        names = sorted(set(targets))
+        if method == "relative_score":
+            # Equal weights
+            return wq.TargetVectors.relative_score({name: 1.0 for name in names})
+        return getattr(wq.TargetVectors, method)(names)
+
+    # Sorted so that equal requests produce equal keys in the query cache
+    weights = {name: float(targets[name]) for name in sorted(targets)}
+    if method == "minimum":
+        raise ValueError("The minimum combination does not take weights")
+    if method == "sum":
+        return wq.TargetVectors.manual_weights(weights)
+    if method == "average":
+        total = sum(weights.values())
+        return wq.TargetVectors.manual_weights({name: weight / total for name, weight in weights.items()})
+    return wq.TargetVectors.relative_score(weights)
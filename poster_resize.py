@@ -0,0 +1,147 @@
+#
+# Weaviate Academy
+# Optional poster pre-resize stage for the multimodal loaders
+#
+# multi2vec-clip downsamples every poster to 224 pixels, so sending the full-size JPEGs
+# only inflates the batch payloads and the `poster` BLOBs stored in Weaviate. With
+# `PosterOptions`, posters are resized (shortest side = `size`, the way CLIP sees them)
+# and re-encoded at `quality` before they are imported. The work runs on a process
+# pool ahead of the import (`prepare_posters`) and the results are cached on disk by
+# the SHA-256 of the source poster, so later loads, and the loader itself (which passes
+# `resize_poster` to iter_posters_b64), just read the cached files.
+#
+# The pool lives in a fresh interpreter running this module, like movie_loader's shard
+# workers. The caller usually holds a connected Weaviate client, and forking a process
+# with live gRPC state can deadlock; spawning from the caller would instead re-run the
+# course scripts, which have no `__main__` guard.
+#
+# Enable it from the course scripts with WEAVIATE_POSTER_SIZE (e.g. 224) and, optionally,
+# WEAVIATE_POSTER_QUALITY (default 85).
+#
+import hashlib
+import multiprocessing
+import os
+import pickle
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import Iterable, List, NamedTuple, Optional
+
+from concurrency import ordered_map
+from dataset_cache import CACHE_DIR
+from image_query import downsize
+from poster_stream import PosterReader
+
+
+POSTER_CACHE_DIR = CACHE_DIR / "posters"
+
+
+class PosterOptions(NamedTuple):
+    size: int = 224  # Target shortest side in pixels
+    quality: int = 85  # JPEG quality of the re-encoded poster
+
+
+class PosterStats(NamedTuple):
+    count: int
+    bytes_before: int
+    bytes_after: int
+    seconds: float
+
+    def print_summary(self) -> None:
+        saved = 1 - self.bytes_after / self.bytes_before if self.bytes_before else 0.0
+        rate = self.count / self.seconds if self.seconds else 0.0
+        print(
+            f"Resized {self.count} posters: {self.bytes_before / 1e6:.1f} MB -> "
+            f"{self.bytes_after / 1e6:.1f} MB ({saved:.0%} smaller) in {self.seconds:.1f}s "
+            f"({rate:.0f} posters/s)"
+        )
+
+
+def options_from_env() -> Optional[PosterOptions]:
+    size = os.getenv("WEAVIATE_POSTER_SIZE")
+    if not size:
+        return None
+    return PosterOptions(int(size), int(os.getenv("WEAVIATE_POSTER_QUALITY", "85")))
+
+
+def cache_path(digest: str, options: PosterOptions) -> Path:
+    return POSTER_CACHE_DIR / f"{options.size}-q{options.quality}" / digest[:2] / f"{digest}.jpg"
+
+
+def resize_poster(data: bytes, options: PosterOptions) -> bytes:
+    # Return the resized poster, from the cache if it was resized before
+    digest = hashlib.sha256(data).hexdigest()
+    path = cache_path(digest, options)
+    if path.exists():
+        return path.read_bytes()
+
+    resized = downsize(data, options.size, options.quality)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_bytes(resized)
+    os.replace(tmp_path, path)
+    return resized
+
+
+def _resize_size(data: bytes, options: PosterOptions) -> int:
+    # Pool task: only the size travels back, the poster itself stays in the cache
+    return len(resize_poster(data, options))
+
+
+def _prepare_posters(
+    zip_path: Path, tmdb_ids: List[int], options: PosterOptions, workers: int, max_pending: int
+) -> PosterStats:
+    # Runs in the worker interpreter (see below)
+    start = time.perf_counter()
+    reader = PosterReader(zip_path)
+    sizes_before = []
+
+    def sources():
+        # Reading the zip stays in this process; decoding and encoding is spread out
+        for tmdb_id in tmdb_ids:
+            data = reader.read(tmdb_id)
+            sizes_before.append(len(data))
+            yield data
+
+    try:
+        # This interpreter holds no client, and its `__main__` is guarded, so spawn is safe
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+            resize = partial(_resize_size, options=options)
+            bytes_after = sum(ordered_map(executor, resize, sources(), max_pending))
+    finally:
+        reader.close()
+    return PosterStats(len(sizes_before), sum(sizes_before), bytes_after, time.perf_counter() - start)
+
+
+def prepare_posters(
+    zip_path: Path,
+    tmdb_ids: Iterable[int],
+    options: PosterOptions,
+    workers: int = os.cpu_count() or 1,
+    max_pending: int = 256,
+) -> PosterStats:
+    # Resize every poster into the cache ahead of the import, in a fresh interpreter
+    with tempfile.TemporaryDirectory(prefix="poster_resize_") as workdir:
+        task_path = Path(workdir) / "posters.task"
+        # Plain values only: this module runs as `__main__` in the worker
+        task = dict(
+            zip_path=str(zip_path), tmdb_ids=list(tmdb_ids), options=tuple(options),
+            workers=workers, max_pending=max_pending,
+        )
+        task_path.write_bytes(pickle.dumps(task))
+        subprocess.run([sys.executable, str(Path(__file__).resolve()), str(task_path)], check=True)
+        return PosterStats(*pickle.loads(task_path.with_suffix(".report").read_bytes()))
+
+
+if __name__ == "__main__":
+    # Worker interpreter: resize the posters described by the task file
+    task_path = Path(sys.argv[1])
+    task = pickle.loads(task_path.read_bytes())
+    task["options"] = PosterOptions(*task["options"])
+    stats = _prepare_posters(**task)
+    task_path.with_suffix(".report").write_bytes(pickle.dumps(tuple(stats)))
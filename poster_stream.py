@@ -0,0 +1,84 @@
+#
+# Weaviate Academy
+# Stream base64-encoded posters straight out of the poster zip
+#
+# Members are read from the archive on a pool of worker threads (each with its own
+# `ZipFile` handle) and encoded there, so disk I/O and base64 overlap with the batch
+# sends. Only `max_pending` posters are held in memory at any time.
+#
+import base64
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, Optional
+
+from concurrency import ordered_map
+from instrumentation import stage
+
+
+def poster_name(tmdb_id: int) -> str:
+    return f"{tmdb_id}_poster.jpg"
+
+
+def poster_crcs(zip_path: Path) -> Dict[int, int]:
+    # CRC-32 of every poster, read from the zip directory without decompressing anything
+    with zipfile.ZipFile(zip_path, "r") as zip_file:
+        return {
+            int(info.filename.split("_", 1)[0]): info.CRC
+            for info in zip_file.infolist()
+            if info.filename.endswith("_poster.jpg")
+        }
+
+
+class PosterReader:
+    def __init__(self, zip_path: Path):
+        self.zip_path = Path(zip_path)
+        self._local = threading.local()
+        self._opened = []
+
+    def _zip(self) -> zipfile.ZipFile:
+        # `ZipFile` objects must not be shared between threads reading concurrently
+        zip_file = getattr(self._local, "zip_file", None)
+        if zip_file is None:
+            zip_file = self._local.zip_file = zipfile.ZipFile(self.zip_path, "r")
+            self._opened.append(zip_file)
+        return zip_file
+
+    def close(self) -> None:
+        for zip_file in self._opened:
+            zip_file.close()
+        self._opened = []
+
+    def read(self, tmdb_id: int) -> bytes:
+        return self._zip().read(poster_name(tmdb_id))
+
+    def read_b64(self, tmdb_id: int) -> str:
+        return base64.b64encode(self.read(tmdb_id)).decode("utf-8")
+
+
+def iter_posters_b64(
+    zip_path: Path,
+    tmdb_ids: Iterable[int],
+    workers: int = 4,
+    max_pending: int = 64,
+    transform: Optional[Callable[[bytes], bytes]] = None,
+) -> Iterator[str]:
+    # Yield the base64-encoded poster of each id, in order. `transform` is applied to the
+    # raw JPEG bytes first (e.g. the pre-resize stage in poster_resize.py).
+    reader = PosterReader(zip_path)
+
+    def encode(tmdb_id: int) -> str:
+        with stage("poster_read"):
+            data = reader.read(tmdb_id)
+        if transform is not None:
+            with stage("poster_resize"):
+                data = transform(data)
+        with stage("poster_encode"):
+            return base64.b64encode(data).decode("utf-8")
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            yield from ordered_map(executor, encode, tmdb_ids, max_pending)
+    finally:
+        reader.close()
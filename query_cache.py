@@ -0,0 +1,244 @@
+#
+# Weaviate Academy
+# Client-side result cache for repeated queries
+#
+# `cached(collection)` wraps a collection so that `query.near_text`, `query.bm25`,
+# `query.hybrid` and `query.near_vector` are answered from an in-memory LRU cache when
+# the same query (same arguments, filters, target vector and limit) was seen recently.
+# Entries expire after `ttl` seconds and are dropped as soon as a loader writes to the
+# collection: the loaders increment a per-collection generation counter on disk, which
+# every lookup compares against, so this also works across processes. Filters and other
+# query objects are keyed by their fields; a call whose arguments can't be keyed that
+# way goes straight to the server.
+#
+import hashlib
+import os
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import fields, is_dataclass
+from datetime import date, datetime
+from enum import Enum
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+from uuid import UUID
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: concurrent bumps are not serialised
+    fcntl = None
+
+
+STAMP_DIR = Path("scratch/query_cache")
+
+
+def _stamp_path(collection_name: str) -> Path:
+    return STAMP_DIR / f"{collection_name}.generation"
+
+
+def _open_stamp(collection_name: str):
+    path = _stamp_path(collection_name)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    return os.fdopen(os.open(path, os.O_RDWR | os.O_CREAT), "r+")
+
+
+def _read_generation(file) -> int:
+    file.seek(0)
+    text = file.read().strip()
+    return int(text) if text.isdigit() else 0
+
+
+def bump_generation(collection_name: str) -> int:
+    # Called by the loaders after writing to a collection; invalidates cached results.
+    # A counter rather than the file's mtime, which can stay the same across two writes.
+    with _open_stamp(collection_name) as file:
+        if fcntl is not None:
+            fcntl.flock(file, fcntl.LOCK_EX)
+        generation = _read_generation(file) + 1
+        file.seek(0)
+        file.truncate()
+        file.write(str(generation))
+        file.flush()
+    return generation
+
+
+def current_generation(collection_name: str) -> int:
+    if not _stamp_path(collection_name).exists():
+        return 0
+    with _open_stamp(collection_name) as file:
+        if fcntl is not None:
+            fcntl.flock(file, fcntl.LOCK_SH)
+        return _read_generation(file)
+
+
+class UncacheableQuery(ValueError):
+    # Raised by `query_key` for arguments without a stable, content-based key
+    pass
+
+
+def _normalize(value: Any, _depth: int = 0) -> Any:
+    # Canonical, hashable form of a query argument
+    if _depth > 32:
+        raise UncacheableQuery("Query argument nested too deeply to build a cache key")
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if isinstance(value, str):
+        return value
+    if isinstance(value, Enum):
+        return f"{type(value).__name__}.{value.name}"
+    if isinstance(value, (datetime, date, UUID)):
+        return repr(value)
+    if isinstance(value, np.ndarray) or (
+        isinstance(value, (list, tuple)) and value and isinstance(value[0], (float, np.floating))
+    ):
+        # Vectors: hash the float32 bytes instead of keeping thousands of floats in the key
+        return "vector:" + hashlib.sha1(np.asarray(value, dtype=np.float32).tobytes()).hexdigest()
+    if isinstance(value, dict):
+        return tuple(sorted((str(k), _normalize(v, _depth + 1)) for k, v in value.items()))
+    if isinstance(value, (list, tuple, set, frozenset)):
+        items = tuple(_normalize(v, _depth + 1) for v in value)
+        return tuple(sorted(items, key=repr)) if isinstance(value, (set, frozenset)) else items
+    # Filters (including &/| trees), MetadataQuery, TargetVectors etc.: key them by type and
+    # fields. Their reprs are not usable: a filter tree's repr is its memory address.
+    if is_dataclass(value) and not isinstance(value, type):
+        attributes = {f.name: getattr(value, f.name) for f in fields(value)}
+    elif hasattr(value, "__dict__"):
+        attributes = {k: v for k, v in vars(value).items() if not k.startswith("__")}
+    else:
+        raise UncacheableQuery(f"Cannot build a cache key for {type(value).__name__}")
+    return (type(value).__qualname__, _normalize(attributes, _depth + 1))
+
+
+def query_key(collection_name: str, kind: str, kwargs: Dict[str, Any]) -> str:
+    if isinstance(kwargs.get("query"), str):
+        # Whitespace in the query text doesn't change the results; in filter values and
+        # property names it does, so every other string is keyed exactly
+        kwargs = dict(kwargs, query=re.sub(r"\s+", " ", kwargs["query"].strip()))
+    normalized = (collection_name, kind, tuple(sorted((k, _normalize(v)) for k, v in kwargs.items())))
+    return hashlib.sha256(repr(normalized).encode("utf-8")).hexdigest()
+
+
+def estimate_size(value: Any, _depth: int = 0) -> int:
+    # Approximate memory held by a query response
+    size = sys.getsizeof(value)
+    if _depth > 8:
+        return size
+    if isinstance(value, dict):
+        size += sum(estimate_size(k, _depth + 1) + estimate_size(v, _depth + 1) for k, v in value.items())
+    elif isinstance(value, (list, tuple)):
+        size += sum(estimate_size(v, _depth + 1) for v in value)
+    elif is_dataclass(value) and not isinstance(value, type):
+        size += sum(estimate_size(getattr(value, f.name, None), _depth + 1) for f in fields(value))
+    return size
+
+
+class QueryCache:
+    def __init__(self, max_entries: int = 1024, ttl: float = 300.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bytes = 0
+        self._lock = threading.Lock()
+        # key -> (collection name, generation, expiry time, size, response)
+        self._entries: "OrderedDict[str, Tuple[str, int, float, int, Any]]" = OrderedDict()
+
+    def get(self, key: str, generation: int) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] == generation and entry[2] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[4]
+            if entry is not None:
+                self._drop(key)
+            self.misses += 1
+            return None
+
+    def put(self, key: str, collection_name: str, generation: int, response: Any) -> None:
+        size = estimate_size(response)
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (collection_name, generation, time.monotonic() + self.ttl, size, response)
+            self.bytes += size
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _drop(self, key: str) -> None:
+        self.bytes -= self._entries.pop(key)[3]
+
+    def invalidate(self, collection_name: Optional[str] = None) -> None:
+        with self._lock:
+            for key in [k for k, e in self._entries.items() if collection_name in (None, e[0])]:
+                self._drop(key)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "entries": len(self._entries),
+                "evictions": self.evictions,
+                "bytes": self.bytes,
+            }
+
+
+default_cache = QueryCache()
+
+
+class CachedQuery:
+    def __init__(self, collection, cache: QueryCache):
+        self._collection = collection
+        self._cache = cache
+
+    def _cached(self, kind: str, kwargs: Dict[str, Any]):
+        name = self._collection.name
+        try:
+            key = query_key(name, kind, kwargs)
+        except UncacheableQuery:
+            return getattr(self._collection.query, kind)(**kwargs)
+        generation = current_generation(name)
+        response = self._cache.get(key, generation)
+        if response is None:
+            response = getattr(self._collection.query, kind)(**kwargs)
+            self._cache.put(key, name, generation, response)
+        return response
+
+    # Same leading positional argument as the client's methods
+    def near_text(self, query, **kwargs):
+        return self._cached("near_text", dict(kwargs, query=query))
+
+    def bm25(self, query, **kwargs):
+        return self._cached("bm25", dict(kwargs, query=query))
+
+    def hybrid(self, query, **kwargs):
+        return self._cached("hybrid", dict(kwargs, query=query))
+
+    def near_vector(self, near_vector, **kwargs):
+        return self._cached("near_vector", dict(kwargs, near_vector=near_vector))
+
+    def __getattr__(self, name: str):
+        # Everything else (near_image, fetch_objects, ...) goes straight to the server
+        return getattr(self._collection.query, name)
+
+
+class CachedCollection:
+    def __init__(self, collection, cache: QueryCache = default_cache):
+        self._collection = collection
+        self.query = CachedQuery(collection, cache)
+
+    def __getattr__(self, name: str):
+        return getattr(self._collection, name)
+
+
+def cached(collection, cache: QueryCache = default_cache) -> CachedCollection:
+    return CachedCollection(collection, cache)
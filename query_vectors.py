@@ -0,0 +1,177 @@
+#
+# Weaviate Academy
+# Embed query text on the client and search by vector
+#
+# With a server-side vectorizer, every `near_text` / `hybrid` call makes Weaviate embed
+# the query string again, paying the OpenAI round trip each time. `vectorized(collection)`
+# wraps a collection so that query strings are embedded once, with the same OpenAI model
+# the collection (or named vector) is configured with, and kept in the persistent
+# EmbeddingCache. Queries whose vector is cached are sent as `near_vector` (or `hybrid`
+# with `vector=`), keeping `target_vector`. On a miss the query runs as `near_text` as
+# before while the vector is embedded in the background, so the next repeat is served
+# from the cache. `02-101v.py` does the same thing by hand with `vectorize(co, ...)`.
+#
+# Only text2vec-openai vectors are handled; anything else always goes to the server.
+#
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import requests
+
+from embedding_cache import EmbeddingCache
+
+
+DEFAULT_MODEL = "text-embedding-3-small"
+INPUT_TYPE = "query"  # Cache namespace; OpenAI embeds queries and documents alike
+
+# Arguments of `near_text` that have no `near_vector` equivalent
+TEXT_ONLY_ARGUMENTS = ("move_to", "move_away")
+
+
+def openai_embed(
+    texts: List[str],
+    model: str,
+    api_key: str,
+    dimensions: Optional[int] = None,
+    base_url: str = "https://api.openai.com",
+    timeout: float = 30.0,
+) -> List[List[float]]:
+    payload = {"input": texts, "model": model}
+    if dimensions:
+        payload["dimensions"] = dimensions
+    response = requests.post(
+        f"{base_url.rstrip('/')}/v1/embeddings",
+        json=payload,
+        headers={"Authorization": f"Bearer {api_key}"},
+        timeout=timeout,
+    )
+    response.raise_for_status()
+    data = sorted(response.json()["data"], key=lambda item: item["index"])
+    return [item["embedding"] for item in data]
+
+
+def openai_settings(collection, target_vector: Optional[str] = None) -> Optional[Dict]:
+    # Model settings of the collection's text2vec-openai vectorizer, or None
+    config = collection.config.get()
+    if target_vector is None and config.vectorizer_config is not None:
+        vectorizer = config.vectorizer_config
+    else:
+        named_vectors = config.vector_config or {}
+        if target_vector is None and len(named_vectors) == 1:
+            target_vector = next(iter(named_vectors))
+        named = named_vectors.get(target_vector)
+        vectorizer = named.vectorizer if named is not None else None
+    if vectorizer is None or getattr(vectorizer.vectorizer, "value", vectorizer.vectorizer) != "text2vec-openai":
+        return None
+    model = dict(vectorizer.model or {})
+    name = model.get("model", DEFAULT_MODEL)
+    if name == "ada":
+        # Legacy configuration style: model "ada" + modelVersion "002"
+        name = f"text-embedding-ada-{model.get('modelVersion', '002')}"
+    return {
+        "model": name,
+        "dimensions": model.get("dimensions"),
+        "base_url": model.get("baseURL") or "https://api.openai.com",
+    }
+
+
+def cache_model_name(settings: Dict) -> str:
+    # EmbeddingCache namespace; the same model at another dimension gives other vectors
+    return f"{settings['model']}:{settings['dimensions'] or ''}"
+
+
+class QueryVectorizer:
+    def __init__(self, api_key: Optional[str] = None, cache: Optional[EmbeddingCache] = None, workers: int = 2):
+        self.api_key = api_key or os.getenv("OPENAI_API_KEY")
+        self.cache = cache if cache is not None else EmbeddingCache()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="query-embed")
+        self._lock = threading.Lock()
+        self._pending = set()  # (cache model, text) being embedded; guarded by _lock
+
+    def lookup(self, settings: Dict, text: str) -> Optional[List[float]]:
+        # Return the cached vector, or None and start embedding it in the background
+        cache_model = cache_model_name(settings)
+        vector = next(iter(self.cache.get_many(cache_model, INPUT_TYPE, [text]).values()), None)
+        if vector is None and self.api_key:
+            with self._lock:
+                if (cache_model, text) in self._pending:
+                    return None
+                self._pending.add((cache_model, text))
+            self._executor.submit(self._embed, settings, cache_model, text)
+        return vector
+
+    def _embed(self, settings: Dict, cache_model: str, text: str) -> None:
+        try:
+            self.cache.get_or_embed(
+                cache_model,
+                INPUT_TYPE,
+                [text],
+                lambda texts: openai_embed(
+                    texts, settings["model"], self.api_key, settings["dimensions"], settings["base_url"]
+                ),
+            )
+        except Exception as exc:
+            # Not fatal: the query keeps going through the server vectorizer
+            print(f"Query embedding failed ({exc})")
+        finally:
+            with self._lock:
+                self._pending.discard((cache_model, text))
+
+    def wait(self) -> None:
+        # Let background embeddings finish (e.g. before a short script exits)
+        self._executor.shutdown(wait=True)
+
+
+class VectorizedQuery:
+    def __init__(self, collection, vectorizer: QueryVectorizer):
+        self._collection = collection
+        self._vectorizer = vectorizer
+        self._settings: Dict[Optional[str], Optional[Dict]] = {}
+
+    def _vector(self, query, target_vector: Optional[str]) -> Optional[List[float]]:
+        if not isinstance(query, str) or not isinstance(target_vector, (str, type(None))):
+            return None
+        if target_vector not in self._settings:
+            self._settings[target_vector] = openai_settings(self._collection, target_vector)
+        settings = self._settings[target_vector]
+        if settings is None:
+            return None
+        return self._vectorizer.lookup(settings, query)
+
+    def near_text(self, query, target_vector: Optional[str] = None, **kwargs):
+        vector = None
+        if not any(kwargs.get(name) is not None for name in TEXT_ONLY_ARGUMENTS):
+            vector = self._vector(query, target_vector)
+        if vector is None:
+            return self._collection.query.near_text(query=query, target_vector=target_vector, **kwargs)
+        return self._collection.query.near_vector(near_vector=vector, target_vector=target_vector, **kwargs)
+
+    def hybrid(self, query, target_vector: Optional[str] = None, vector=None, **kwargs):
+        # The query string is still used for the keyword half of the search
+        if vector is None and query is not None:
+            vector = self._vector(query, target_vector)
+        return self._collection.query.hybrid(query=query, vector=vector, target_vector=target_vector, **kwargs)
+
+    def __getattr__(self, name: str):
+        return getattr(self._collection.query, name)
+
+
+class VectorizedCollection:
+    def __init__(self, collection, vectorizer: QueryVectorizer):
+        self._collection = collection
+        self.vectorizer = vectorizer
+        self.query = VectorizedQuery(collection, vectorizer)
+
+    def __getattr__(self, name: str):
+        return getattr(self._collection, name)
+
+
+def vectorized(
+    collection, headers: Optional[Dict[str, str]] = None, vectorizer: Optional[QueryVectorizer] = None
+) -> VectorizedCollection:
+    # Use the same OpenAI key the client sends to Weaviate
+    if vectorizer is None:
+        vectorizer = QueryVectorizer(api_key=(headers or {}).get("X-OpenAI-Api-Key"))
+    return VectorizedCollection(collection, vectorizer)
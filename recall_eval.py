@@ -0,0 +1,248 @@
+#
+# Weaviate Academy
+# Offline recall evaluation of the server's HNSW index
+#
+# Exports every vector of a collection (or one named vector, e.g. MovieNVDemo's
+# "title") through the cursor API into a memory-mapped float32 .npy matrix, plus the
+# matching tmdb_ids (the embedding_store.py layout), so memory stays flat however large
+# the collection is. Ground truth comes from an exact, blocked matrix-multiply search
+# over that matrix; an optional NumPy IVF index shows what a simple local ANN achieves.
+# The same query vectors are sent through `near_vector` and recall@k is reported, per
+# `ef` value when `--ef` is given (the collection's ef is changed for the run and put
+# back afterwards; maxConnections is fixed at creation, so compare collections for that).
+#
+# Usage:
+#   python recall_eval.py Movie --k 10 --queries 200 --ef 32 64 128
+#   python recall_eval.py MovieNVDemo --target-vector title --ivf 64 --nprobe 8
+#
+import argparse
+import os
+import time
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+import weaviate.classes.config as wc
+
+from batch_queries import batch_query
+from client_factory import close_clients, get_client
+from embedding_store import ids_path, load_embeddings
+
+
+EXPORT_DIR = Path("scratch/exports")
+METRICS = ("cosine", "dot", "l2-squared")
+
+
+def export_vectors(
+    collection, path: Path, target_vector: Optional[str] = None, id_property: str = "tmdb_id"
+) -> Tuple[np.ndarray, np.ndarray]:
+    # Stream the vectors into `path` (.npy, memory-mapped) and the ids next to it
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    total = collection.aggregate.over_all(total_count=True).total_count
+    name = target_vector or "default"
+    matrix = None
+    ids = np.zeros(total, dtype=np.int64)
+    rows = 0
+    for obj in collection.iterator(include_vector=True, return_properties=[id_property]):
+        if rows == total:
+            print(f"{collection.name} grew during the export; stopping at {total} objects")
+            break
+        vector = obj.vector[name]
+        if matrix is None:
+            matrix = np.lib.format.open_memmap(path, mode="w+", dtype=np.float32, shape=(total, len(vector)))
+        matrix[rows] = vector
+        ids[rows] = obj.properties[id_property]
+        rows += 1
+    if matrix is None:
+        raise ValueError(f"{collection.name} has no objects to export")
+    if rows < total:
+        # Objects were deleted during the export; keep only the rows written
+        tmp_path = path.with_suffix(".tmp.npy")
+        trimmed = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.float32, shape=(rows, matrix.shape[1]))
+        trimmed[:] = matrix[:rows]
+        trimmed.flush()
+        del matrix, trimmed
+        os.replace(tmp_path, path)
+    else:
+        matrix.flush()
+        del matrix
+    np.save(ids_path(path), ids[:rows])
+    return load_embeddings(path)
+
+
+def _prepare(vectors: np.ndarray, metric: str) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if metric == "cosine":
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+    return vectors
+
+
+def _block_scores(block: np.ndarray, queries: np.ndarray, metric: str) -> np.ndarray:
+    # Higher is better: similarity for cosine/dot, negative squared distance for l2
+    if metric == "cosine":
+        block = _prepare(block, metric)
+    scores = queries @ block.T
+    if metric == "l2-squared":
+        scores = 2 * scores - (block * block).sum(axis=1)[None, :] - (queries * queries).sum(axis=1)[:, None]
+    return scores
+
+
+def _merge_top_k(best_scores, best_rows, scores, rows, k):
+    scores = np.concatenate([best_scores, scores], axis=1)
+    rows = np.concatenate([best_rows, rows], axis=1)
+    keep = np.argpartition(-scores, min(k, scores.shape[1] - 1), axis=1)[:, :k]
+    return np.take_along_axis(scores, keep, axis=1), np.take_along_axis(rows, keep, axis=1)
+
+
+def _sort_top_k(scores: np.ndarray, rows: np.ndarray) -> np.ndarray:
+    order = np.argsort(-scores, axis=1, kind="stable")
+    return np.take_along_axis(rows, order, axis=1)
+
+
+def exact_search(
+    matrix: np.ndarray, queries: np.ndarray, k: int = 10, metric: str = "cosine", block_size: int = 65536
+) -> np.ndarray:
+    # Row indices of the k nearest rows per query, best first. The matrix is read one
+    # block at a time, so a memory-mapped export never has to fit in memory.
+    queries = _prepare(queries, metric)
+    best_scores = np.full((len(queries), 0), -np.inf, dtype=np.float32)
+    best_rows = np.zeros((len(queries), 0), dtype=np.int64)
+    for start in range(0, len(matrix), block_size):
+        block = np.asarray(matrix[start:start + block_size], dtype=np.float32)
+        scores = _block_scores(block, queries, metric)
+        rows = np.broadcast_to(np.arange(start, start + len(block)), scores.shape)
+        best_scores, best_rows = _merge_top_k(best_scores, best_rows, scores, rows, k)
+    return _sort_top_k(best_scores, best_rows)
+
+
+class IVFIndex:
+    # Inverted-file ANN index: k-means centroids, search only the `nprobe` closest lists
+    def __init__(self, matrix: np.ndarray, nlist: int = 64, metric: str = "cosine", iterations: int = 10,
+                 sample: int = 50000, block_size: int = 65536, seed: int = 42):
+        self.matrix = matrix
+        self.metric = metric
+        rng = np.random.default_rng(seed)
+        sample_rows = np.sort(rng.choice(len(matrix), size=min(sample, len(matrix)), replace=False))
+        training = _prepare(matrix[sample_rows], metric)
+        centroids = training[rng.choice(len(training), size=min(nlist, len(training)), replace=False)]
+        for _ in range(iterations):
+            assignment = np.argmax(_block_scores(training, _prepare(centroids, metric), metric), axis=0)
+            for cluster in range(len(centroids)):
+                members = training[assignment == cluster]
+                if len(members):
+                    centroids[cluster] = members.mean(axis=0)
+        self.centroids = _prepare(centroids, metric)
+
+        assignment = np.empty(len(matrix), dtype=np.int64)
+        for start in range(0, len(matrix), block_size):
+            block = np.asarray(matrix[start:start + block_size], dtype=np.float32)
+            assignment[start:start + len(block)] = np.argmax(_block_scores(block, self.centroids, metric), axis=0)
+        self.lists = [np.flatnonzero(assignment == cluster) for cluster in range(len(self.centroids))]
+
+    def search(self, queries: np.ndarray, k: int = 10, nprobe: int = 8) -> np.ndarray:
+        queries = _prepare(queries, self.metric)
+        probes = np.argsort(-_block_scores(self.centroids, queries, self.metric), axis=1)[:, :nprobe]
+        results = np.full((len(queries), k), -1, dtype=np.int64)
+        for i, query in enumerate(queries):
+            # Sorted row numbers read the memory-mapped matrix sequentially
+            rows = np.sort(np.concatenate([self.lists[cluster] for cluster in probes[i]]))
+            if not len(rows):
+                continue
+            scores = _block_scores(np.asarray(self.matrix[rows], dtype=np.float32), query[None, :], self.metric)[0]
+            top = np.argsort(-scores, kind="stable")[:k]
+            results[i, :len(top)] = rows[top]
+        return results
+
+
+def recall_at_k(truth: np.ndarray, found: List[np.ndarray], k: int) -> float:
+    hits = [len(set(t[:k].tolist()) & set(np.asarray(f)[:k].tolist())) for t, f in zip(truth, found)]
+    return float(np.mean(hits)) / k
+
+
+def server_results(collection, queries: np.ndarray, k: int, target_vector: Optional[str],
+                   id_property: str = "tmdb_id", concurrency: int = 8) -> List[np.ndarray]:
+    responses = batch_query(
+        collection, [query.tolist() for query in queries], concurrency=concurrency,
+        limit=k, target_vector=target_vector, return_properties=[id_property],
+    )
+    return [np.array([o.properties[id_property] for o in response.objects]) for response in responses]
+
+
+def set_ef(collection, ef: int, target_vector: Optional[str]) -> None:
+    if target_vector is None:
+        collection.config.update(vector_index_config=wc.Reconfigure.VectorIndex.hnsw(ef=ef))
+    else:
+        collection.config.update(vectorizer_config=[
+            wc.Reconfigure.NamedVectors.update(target_vector, vector_index_config=wc.Reconfigure.VectorIndex.hnsw(ef=ef))
+        ])
+
+
+def current_ef(collection, target_vector: Optional[str]) -> int:
+    config = collection.config.get()
+    if target_vector is None:
+        return config.vector_index_config.ef
+    return config.vector_config[target_vector].vector_index_config.ef
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("collection")
+    parser.add_argument("--target-vector", help="Named vector to evaluate (MovieNVDemo)")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=200, help="Stored vectors sampled as queries")
+    parser.add_argument("--metric", choices=METRICS, default="cosine")
+    parser.add_argument("--ef", type=int, nargs="+", help="Server ef values to evaluate")
+    parser.add_argument("--ivf", type=int, metavar="NLIST", help="Also evaluate a local IVF index")
+    parser.add_argument("--nprobe", type=int, default=8)
+    parser.add_argument("--reuse-export", action="store_true", help="Use the vectors exported by an earlier run")
+    args = parser.parse_args()
+
+    client = get_client({"X-OpenAI-Api-Key": os.getenv("OPENAI_API_KEY")})
+    try:
+        movies = client.collections.get(args.collection)
+        path = EXPORT_DIR / f"{args.collection}-{args.target_vector or 'default'}.npy"
+        if args.reuse_export and path.exists():
+            ids, matrix = load_embeddings(path)
+        else:
+            start = time.perf_counter()
+            ids, matrix = export_vectors(movies, path, args.target_vector)
+            print(f"Exported {matrix.shape[0]} x {matrix.shape[1]} vectors in {time.perf_counter() - start:.1f}s")
+
+        rng = np.random.default_rng(42)
+        query_rows = np.sort(rng.choice(len(matrix), size=min(args.queries, len(matrix)), replace=False))
+        queries = np.asarray(matrix[query_rows], dtype=np.float32)
+
+        start = time.perf_counter()
+        truth = ids[exact_search(matrix, queries, args.k, args.metric)]
+        print(f"Exact search: {len(queries)} queries in {time.perf_counter() - start:.2f}s")
+
+        if args.ivf:
+            start = time.perf_counter()
+            index = IVFIndex(matrix, args.ivf, args.metric)
+            built = time.perf_counter() - start
+            start = time.perf_counter()
+            found = index.search(queries, args.k, args.nprobe)
+            print(
+                f"Local IVF (nlist={args.ivf}, nprobe={args.nprobe}): recall@{args.k} "
+                f"{recall_at_k(truth, [ids[row[row >= 0]] for row in found], args.k):.4f} "
+                f"(build {built:.1f}s, search {time.perf_counter() - start:.2f}s)"
+            )
+
+        original_ef = current_ef(movies, args.target_vector)
+        try:
+            for ef in args.ef or [original_ef]:
+                if ef != original_ef:
+                    set_ef(movies, ef, args.target_vector)
+                start = time.perf_counter()
+                found = server_results(movies, queries, args.k, args.target_vector)
+                print(
+                    f"Server HNSW (ef={ef}): recall@{args.k} {recall_at_k(truth, found, args.k):.4f} "
+                    f"({len(queries) / (time.perf_counter() - start):.0f} queries/s)"
+                )
+        finally:
+            if args.ef:
+                set_ef(movies, original_ef, args.target_vector)
+    finally:
+        close_clients()
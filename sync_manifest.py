@@ -0,0 +1,89 @@
+#
+# Weaviate Academy
+# Content-hash manifest for incremental (delta) loads
+#
+# The manifest maps each object UUID to a hash of the source row it was built from
+# (plus the poster's CRC for the multimodal collections). Comparing it with the current
+# dataset tells the loader which objects to insert, update or delete, so an unchanged
+# movie is never re-sent and never re-vectorized.
+#
+# Objects that end up in the dead-letter queue keep their old hash in the manifest; their
+# new hash is parked in `<collection>.pending.json` until a replay stores them.
+#
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+from weaviate.util import generate_uuid5
+
+
+MANIFEST_DIR = Path("scratch/manifests")
+
+# Source columns that end up in the object properties
+HASHED_COLUMNS = ["title", "overview", "vote_average", "genre_ids", "release_date", "id"]
+
+
+def manifest_path(collection_name: str) -> Path:
+    return MANIFEST_DIR / f"{collection_name}.json"
+
+
+def pending_path(collection_name: str) -> Path:
+    return MANIFEST_DIR / f"{collection_name}.pending.json"
+
+
+def _read(path: Path) -> Dict[str, str]:
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text())
+
+
+def _write(path: Path, hashes: Dict[str, str]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_text(json.dumps(hashes))
+    os.replace(tmp_path, path)
+
+
+def load_manifest(collection_name: str) -> Dict[str, str]:
+    return _read(manifest_path(collection_name))
+
+
+def save_manifest(collection_name: str, manifest: Dict[str, str], pending: Optional[Dict[str, str]] = None) -> None:
+    # `pending` holds the hashes of the objects that were dead-lettered by this load
+    _write(manifest_path(collection_name), manifest)
+    _write(pending_path(collection_name), pending or {})
+
+
+def record_stored(collection_name: str, uuids: Iterable[str]) -> int:
+    # Move the pending hashes of `uuids` (e.g. replayed dead letters) into the manifest
+    pending = _read(pending_path(collection_name))
+    stored = {uuid: pending.pop(uuid) for uuid in uuids if uuid in pending}
+    if stored:
+        manifest = load_manifest(collection_name)
+        manifest.update(stored)
+        save_manifest(collection_name, manifest, pending)
+    return len(stored)
+
+
+def content_hashes(df: pd.DataFrame, poster_crcs: Optional[Dict[int, int]] = None) -> pd.Series:
+    # One hash per row, indexed like `df`
+    rows = df[HASHED_COLUMNS].astype(str).agg("\x1f".join, axis=1)
+    if poster_crcs is not None:
+        rows = rows + "\x1f" + df["id"].map(poster_crcs).astype(str)
+    return rows.map(lambda row: hashlib.sha1(row.encode("utf-8")).hexdigest())
+
+
+def plan_sync(
+    df: pd.DataFrame, manifest: Dict[str, str], poster_crcs: Optional[Dict[int, int]] = None
+) -> Tuple[pd.DataFrame, List[str], Dict[str, str]]:
+    # Return (rows to insert or update, UUIDs to delete, manifest for the current dataset)
+    uuids = df["id"].map(generate_uuid5)
+    hashes = content_hashes(df, poster_crcs)
+    current = dict(zip(uuids, hashes))
+
+    changed = [manifest.get(uuid) != content_hash for uuid, content_hash in zip(uuids, hashes)]
+    deleted = [uuid for uuid in manifest if uuid not in current]
+    return df[changed], deleted, current
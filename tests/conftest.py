@@ -0,0 +1,8 @@
+#
+# Weaviate Academy
+# Test setup: the course modules live at the repository root
+#
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
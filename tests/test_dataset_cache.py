@@ -0,0 +1,104 @@
+#
+# Weaviate Academy
+# Tests for dataset_cache.fetch / fetch_json against a local HTTP server
+#
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from dataset_cache import fetch, fetch_json
+
+
+class DatasetServer:
+    # Serves `body` with `etag`, answering 304 to a matching If-None-Match
+    def __init__(self):
+        self.body = b'[{"title": "Inception"}]'
+        self.etag = '"v1"'
+        self.requests = []  # (If-None-Match header, status) per request
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if_none_match = self.headers.get("If-None-Match")
+                if if_none_match == server.etag:
+                    server.requests.append((if_none_match, 304))
+                    self.send_response(304)
+                    self.send_header("ETag", server.etag)
+                    self.end_headers()
+                    return
+                server.requests.append((if_none_match, 200))
+                self.send_response(200)
+                self.send_header("ETag", server.etag)
+                self.send_header("Content-Length", str(len(server.body)))
+                self.end_headers()
+                self.wfile.write(server.body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/movies.json"
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def server():
+    server = DatasetServer()
+    yield server
+    server.stop()
+
+
+def test_revalidates_with_etag(server, tmp_path):
+    first = fetch(server.url, cache_dir=tmp_path, offline=False)
+    second = fetch(server.url, cache_dir=tmp_path, offline=False)
+
+    assert first == second
+    assert second.read_bytes() == server.body
+    assert server.requests == [(None, 200), ('"v1"', 304)]
+
+
+def test_changed_etag_replaces_cached_copy(server, tmp_path):
+    fetch(server.url, cache_dir=tmp_path, offline=False)
+    server.body = b'[{"title": "Interstellar"}]'
+    server.etag = '"v2"'
+
+    data = fetch_json(server.url, cache_dir=tmp_path, offline=False)
+
+    assert data == [{"title": "Interstellar"}]
+    assert server.requests == [(None, 200), ('"v1"', 200)]
+    # The entry now revalidates against the new ETag
+    fetch(server.url, cache_dir=tmp_path, offline=False)
+    assert server.requests[-1] == ('"v2"', 304)
+
+
+def test_falls_back_to_cache_when_unreachable(server, tmp_path):
+    cached = fetch(server.url, cache_dir=tmp_path, offline=False)
+    server.stop()
+
+    assert fetch(server.url, cache_dir=tmp_path, offline=False, timeout=2) == cached
+    assert json.loads(cached.read_bytes()) == [{"title": "Inception"}]
+
+
+def test_unreachable_without_cache_raises(server, tmp_path):
+    server.stop()
+
+    with pytest.raises(requests.ConnectionError):
+        fetch(server.url, cache_dir=tmp_path, offline=False, timeout=2)
+
+
+def test_offline_uses_cache_without_requests(server, tmp_path):
+    cached = fetch(server.url, cache_dir=tmp_path, offline=False)
+
+    assert fetch(server.url, cache_dir=tmp_path, offline=True) == cached
+    assert len(server.requests) == 1
+    with pytest.raises(FileNotFoundError):
+        fetch(server.url + "?other", cache_dir=tmp_path, offline=True)
@@ -0,0 +1,61 @@
+#
+# Weaviate Academy
+# Tests for embedding_cache: float32 results, misses embedded once, rows in input order
+#
+import numpy as np
+
+from embedding_cache import EmbeddingCache, text_digest
+from embedding_store import load_embeddings, save_embeddings
+
+
+def fake_embed(calls):
+    def embed(texts):
+        calls.append(list(texts))
+        return [[float(len(t)), 1.0, 2.0] for t in texts]
+
+    return embed
+
+
+def test_get_or_embed_returns_a_float32_matrix_in_input_order(tmp_path):
+    cache = EmbeddingCache(tmp_path / "cache.sqlite")
+    calls = []
+    texts = ["a", "bbb", "a", "cc"]
+    matrix = cache.get_or_embed("m", "doc", texts, fake_embed(calls))
+
+    assert isinstance(matrix, np.ndarray)
+    assert matrix.dtype == np.float32
+    assert matrix.shape == (4, 3)
+    assert matrix[:, 0].tolist() == [1.0, 3.0, 1.0, 2.0]
+    assert calls == [["a", "bbb", "cc"]]  # duplicates embedded once
+
+
+def test_cached_rows_are_not_embedded_again(tmp_path):
+    cache = EmbeddingCache(tmp_path / "cache.sqlite")
+    calls = []
+    cache.get_or_embed("m", "doc", ["a", "bbb"], fake_embed(calls))
+    matrix = cache.get_or_embed("m", "doc", ["cc", "bbb", "a"], fake_embed(calls))
+
+    assert calls == [["a", "bbb"], ["cc"]]
+    assert matrix[:, 0].tolist() == [2.0, 3.0, 1.0]
+    assert cache.hits == 2 and cache.misses == 3
+
+
+def test_get_many_returns_float32_arrays(tmp_path):
+    cache = EmbeddingCache(tmp_path / "cache.sqlite")
+    cache.put_many("m", "doc", ["a"], [[0.5, 0.25]])
+    found = cache.get_many("m", "doc", ["a", "missing"])
+
+    assert list(found) == [text_digest("a")]
+    vector = found[text_digest("a")]
+    assert isinstance(vector, np.ndarray) and vector.dtype == np.float32
+    assert vector.tolist() == [0.5, 0.25]
+
+
+def test_matrix_is_saved_without_conversion(tmp_path):
+    cache = EmbeddingCache(tmp_path / "cache.sqlite")
+    matrix = cache.get_or_embed("m", "doc", ["a", "bbb"], fake_embed([]))
+    save_embeddings(tmp_path / "emb.npy", [10, 20], matrix)
+    ids, loaded = load_embeddings(tmp_path / "emb.npy")
+
+    assert ids.tolist() == [10, 20]
+    assert np.array_equal(loaded, matrix)
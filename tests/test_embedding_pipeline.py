@@ -0,0 +1,96 @@
+#
+# Weaviate Academy
+# Tests for embedding_pipeline: in-flight limit on 429s, Retry-After, too-large payloads
+#
+import threading
+import time
+
+import pytest
+
+from embedding_pipeline import EmbeddingPipeline, retry_after
+
+
+class ProviderError(Exception):
+    def __init__(self, status_code, message="", headers=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+class FakeProvider:
+    # Embeds each text as [len(text)]; returns 429 above `max_concurrent` open calls and
+    # 413 above `max_texts` texts per call
+    def __init__(self, max_concurrent=100, max_texts=1000, latency=0.01, headers=None):
+        self.max_concurrent = max_concurrent
+        self.max_texts = max_texts
+        self.latency = latency
+        self.headers = headers
+        self.lock = threading.Lock()
+        self.open = 0
+        self.batch_sizes = []
+        self.rejected = 0
+
+    def __call__(self, texts):
+        with self.lock:
+            self.open += 1
+            limited = self.open > self.max_concurrent
+            self.batch_sizes.append(len(texts))
+        try:
+            if limited:
+                with self.lock:
+                    self.rejected += 1
+                raise ProviderError(429, "too many requests", self.headers)
+            if len(texts) > self.max_texts:
+                raise ProviderError(413, "payload too large")
+            time.sleep(self.latency)
+            return [[float(len(t))] for t in texts]
+        finally:
+            with self.lock:
+                self.open -= 1
+
+
+TEXTS = [f"movie {i}" for i in range(400)]
+EXPECTED = [[float(len(t))] for t in TEXTS]
+
+
+def test_rate_limits_lower_the_in_flight_limit_not_the_batch_size():
+    provider = FakeProvider(max_concurrent=3)
+    pipeline = EmbeddingPipeline(max_in_flight=8, batch_size=20, backoff=0.01)
+    assert pipeline.run(provider, TEXTS) == EXPECTED
+    assert provider.rejected > 0
+    assert pipeline.limit < 8
+    assert pipeline.batch_size == 20
+    assert set(provider.batch_sizes) == {20}
+
+
+def test_in_flight_limit_grows_back_after_successes():
+    pipeline = EmbeddingPipeline(max_in_flight=8)
+    pipeline.limit = 2
+    streak = 0
+    for _ in range(2):
+        streak = pipeline._on_success(streak)
+    assert pipeline.limit == 3
+
+
+def test_too_large_payloads_shrink_and_split_the_batch():
+    provider = FakeProvider(max_texts=10)
+    pipeline = EmbeddingPipeline(max_in_flight=2, batch_size=40, min_batch_size=5, backoff=0.01)
+    assert pipeline.run(provider, TEXTS) == EXPECTED
+    assert pipeline.batch_size <= 20
+    assert pipeline.limit == 2
+
+
+def test_retry_after_is_honoured():
+    provider = FakeProvider(max_concurrent=0, headers={"Retry-After": "0.2"})
+    pipeline = EmbeddingPipeline(max_in_flight=1, batch_size=10, max_retries=1, backoff=0.0)
+    start = time.perf_counter()
+    with pytest.raises(ProviderError):
+        pipeline.run(provider, TEXTS[:10])
+    assert time.perf_counter() - start >= 0.2
+
+
+def test_retry_after_parsing():
+    assert retry_after(ProviderError(429, headers={"Retry-After": "3"})) == 3.0
+    assert retry_after(ProviderError(429, headers={"retry-after": "1.5"})) == 1.5
+    assert retry_after(ProviderError(429, headers={"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"})) is None
+    assert retry_after(ProviderError(429)) is None
@@ -0,0 +1,55 @@
+#
+# Weaviate Academy
+# Tests for image_query.url_to_base64: in-process reuse of downsized query images
+#
+import base64
+import io
+
+import pytest
+from PIL import Image
+
+import image_query
+from image_query import url_to_base64
+from test_dataset_cache import DatasetServer
+
+
+@pytest.fixture
+def server():
+    server = DatasetServer()
+    image = Image.new("RGB", (640, 480), (200, 30, 30))
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG")
+    server.body = buffer.getvalue()
+    yield server
+    server.stop()
+
+
+@pytest.fixture(autouse=True)
+def empty_memory_cache(monkeypatch):
+    monkeypatch.setattr(image_query, "_encoded", {})
+
+
+def test_repeated_calls_do_not_touch_the_network(server, tmp_path):
+    first = url_to_base64(server.url, cache_dir=tmp_path)
+    second = url_to_base64(server.url, cache_dir=tmp_path)
+
+    assert first == second
+    assert len(server.requests) == 1
+    with Image.open(io.BytesIO(base64.b64decode(first))) as image:
+        assert min(image.size) == image_query.CLIP_SIZE
+
+
+def test_each_size_is_cached_separately(server, tmp_path):
+    small = url_to_base64(server.url, size=64, cache_dir=tmp_path)
+    large = url_to_base64(server.url, size=224, cache_dir=tmp_path)
+
+    assert small != large
+    assert url_to_base64(server.url, size=64, cache_dir=tmp_path) == small
+    assert len(server.requests) == 2
+
+
+def test_expired_entries_are_revalidated(server, tmp_path):
+    url_to_base64(server.url, cache_dir=tmp_path, max_age=0)
+    url_to_base64(server.url, cache_dir=tmp_path, max_age=0)
+
+    assert [status for _, status in server.requests] == [200, 304]
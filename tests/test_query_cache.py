@@ -0,0 +1,224 @@
+#
+# Weaviate Academy
+# Tests for query_cache: cache keys, TTL, LRU eviction and generation invalidation
+#
+from datetime import datetime
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+import weaviate.classes.query as wq
+
+import query_cache
+from query_cache import QueryCache, bump_generation, cached, current_generation, query_key
+
+
+@pytest.fixture(autouse=True)
+def stamp_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(query_cache, "STAMP_DIR", tmp_path / "query_cache")
+
+
+class FakeQuery:
+    # Stands in for `collection.query`; returns a new response per call
+    def __init__(self):
+        self.calls = []
+
+    def _respond(self, kind, kwargs):
+        self.calls.append((kind, kwargs))
+        return SimpleNamespace(objects=[len(self.calls)])
+
+    def near_text(self, query, **kwargs):
+        return self._respond("near_text", dict(kwargs, query=query))
+
+    def bm25(self, query, **kwargs):
+        return self._respond("bm25", dict(kwargs, query=query))
+
+    def hybrid(self, query, **kwargs):
+        return self._respond("hybrid", dict(kwargs, query=query))
+
+    def near_vector(self, near_vector, **kwargs):
+        return self._respond("near_vector", dict(kwargs, near_vector=near_vector))
+
+    def fetch_objects(self, **kwargs):
+        return self._respond("fetch_objects", kwargs)
+
+
+def fake_collection(name="Movie"):
+    return SimpleNamespace(name=name, query=FakeQuery())
+
+
+def year_filter(year):
+    return wq.Filter.by_property("year").equal(year) & wq.Filter.by_property("title").like("Star*")
+
+
+def test_filter_trees_with_different_values_get_different_keys():
+    keys = {query_key("Movie", "near_text", {"query": "space", "filters": year_filter(y)}) for y in (1999, 2000, 2001)}
+    assert len(keys) == 3
+
+
+def test_whitespace_in_filter_values_is_part_of_the_key():
+    spaced = wq.Filter.by_property("title").equal("Star  Wars")
+    single = wq.Filter.by_property("title").equal("Star Wars")
+    assert query_key("Movie", "near_text", {"query": "space", "filters": spaced}) != query_key(
+        "Movie", "near_text", {"query": "space", "filters": single}
+    )
+
+
+def test_equal_filter_trees_get_equal_keys():
+    first = query_key("Movie", "near_text", {"query": "space", "filters": year_filter(2000)})
+    second = query_key("Movie", "near_text", {"query": "space", "filters": year_filter(2000)})
+    assert first == second
+
+
+def test_filter_operators_and_dates_are_part_of_the_key():
+    after = wq.Filter.by_property("release_date").greater_than(datetime(2020, 1, 1))
+    before = wq.Filter.by_property("release_date").less_than(datetime(2020, 1, 1))
+    later = wq.Filter.by_property("release_date").greater_than(datetime(2021, 1, 1))
+    either = wq.Filter.by_property("year").equal(2000) | wq.Filter.by_property("title").like("Star*")
+    keys = {
+        query_key("Movie", "bm25", {"query": "history", "filters": f})
+        for f in (after, before, later, either, year_filter(2000))
+    }
+    assert len(keys) == 5
+
+
+def test_metadata_query_is_part_of_the_key():
+    distance = query_key("Movie", "near_text", {"query": "x", "return_metadata": wq.MetadataQuery(distance=True)})
+    score = query_key("Movie", "near_text", {"query": "x", "return_metadata": wq.MetadataQuery(score=True)})
+    same = query_key("Movie", "near_text", {"query": "x", "return_metadata": wq.MetadataQuery(distance=True)})
+    assert distance != score
+    assert distance == same
+
+
+def test_target_vector_combinations_are_part_of_the_key():
+    total = query_key("M", "near_text", {"query": "x", "target_vector": wq.TargetVectors.sum(["title", "overview"])})
+    minimum = query_key("M", "near_text", {"query": "x", "target_vector": wq.TargetVectors.minimum(["title", "overview"])})
+    assert total != minimum
+
+
+def test_query_text_whitespace_is_normalized():
+    assert query_key("Movie", "bm25", {"query": "  space   opera "}) == query_key("Movie", "bm25", {"query": "space opera"})
+    assert query_key("Movie", "bm25", {"query": "space opera"}) != query_key("Movie", "bm25", {"query": "space"})
+
+
+def test_vectors_are_keyed_by_content():
+    vector = [0.1, 0.2, 0.3]
+    assert query_key("M", "near_vector", {"near_vector": vector}) == query_key(
+        "M", "near_vector", {"near_vector": np.array(vector)}
+    )
+    assert query_key("M", "near_vector", {"near_vector": vector}) != query_key(
+        "M", "near_vector", {"near_vector": [0.1, 0.2, 0.4]}
+    )
+
+
+def test_collection_and_kind_are_part_of_the_key():
+    keys = {
+        query_key("Movie", "bm25", {"query": "x"}),
+        query_key("MovieMM", "bm25", {"query": "x"}),
+        query_key("Movie", "hybrid", {"query": "x"}),
+    }
+    assert len(keys) == 3
+
+
+def test_repeated_query_is_served_from_cache():
+    movies = fake_collection()
+    cache = QueryCache()
+    first = cached(movies, cache).query.near_text(query="space", limit=5, filters=year_filter(2000))
+    second = cached(movies, cache).query.near_text(query="space", limit=5, filters=year_filter(2000))
+    other = cached(movies, cache).query.near_text(query="space", limit=5, filters=year_filter(2001))
+
+    assert first is second
+    assert other is not first
+    assert len(movies.query.calls) == 2
+    assert cache.stats()["hits"] == 1
+
+
+def test_positional_query_argument():
+    movies = fake_collection()
+    cache = QueryCache()
+    query = cached(movies, cache).query
+    assert query.near_text("space", limit=5) is query.near_text(query="space", limit=5)
+    assert query.near_vector([0.1, 0.2], limit=5) is query.near_vector(near_vector=[0.1, 0.2], limit=5)
+    assert query.bm25("history") is query.bm25(query="history")
+    assert query.hybrid("history", alpha=0.5) is query.hybrid(query="history", alpha=0.5)
+    assert len(movies.query.calls) == 4
+
+
+def test_other_methods_are_not_cached():
+    movies = fake_collection()
+    query = cached(movies, QueryCache()).query
+    query.fetch_objects(limit=5)
+    query.fetch_objects(limit=5)
+    assert len(movies.query.calls) == 2
+
+
+def test_uncacheable_arguments_go_to_the_server():
+    movies = fake_collection()
+    cache = QueryCache()
+    query = cached(movies, cache).query
+    query.near_text("space", filters=object())
+    query.near_text("space", filters=object())
+    assert len(movies.query.calls) == 2
+    assert cache.stats()["entries"] == 0
+
+
+def test_entries_expire_after_ttl():
+    movies = fake_collection()
+    expired = cached(movies, QueryCache(ttl=0)).query
+    expired.bm25("history")
+    expired.bm25("history")
+    assert len(movies.query.calls) == 2
+
+    fresh = cached(movies, QueryCache(ttl=60)).query
+    fresh.bm25("history")
+    fresh.bm25("history")
+    assert len(movies.query.calls) == 3
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = QueryCache(max_entries=2)
+    cache.put("a", "Movie", 0, "A")
+    cache.put("b", "Movie", 0, "B")
+    assert cache.get("a", 0) == "A"  # "b" is now the least recently used
+    cache.put("c", "Movie", 0, "C")
+
+    assert cache.get("b", 0) is None
+    assert cache.get("a", 0) == "A"
+    assert cache.get("c", 0) == "C"
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["entries"] == 2
+
+
+def test_generation_is_a_counter():
+    assert current_generation("Movie") == 0
+    assert bump_generation("Movie") == 1
+    assert bump_generation("Movie") == 2
+    assert current_generation("Movie") == 2
+    assert current_generation("MovieMM") == 0
+
+
+def test_bumping_the_generation_invalidates_entries():
+    movies = fake_collection()
+    other = fake_collection("MovieMM")
+    cache = QueryCache()
+    cached(movies, cache).query.bm25("history")
+    cached(other, cache).query.bm25("history")
+
+    # Two bumps in quick succession must both invalidate
+    bump_generation("Movie")
+    cached(movies, cache).query.bm25("history")
+    bump_generation("Movie")
+    cached(movies, cache).query.bm25("history")
+    cached(other, cache).query.bm25("history")
+
+    assert len(movies.query.calls) == 3
+    assert len(other.query.calls) == 1
+
+
+def test_invalidate_drops_one_collection():
+    cache = QueryCache()
+    cache.put("a", "Movie", 0, "A")
+    cache.put("b", "MovieMM", 0, "B")
+    cache.invalidate("Movie")
+    assert cache.get("a", 0) is None
+    assert cache.get("b", 0) == "B"
@@ -0,0 +1,138 @@
+#
+# Weaviate Academy
+# Tests for incremental sync: manifest / collection mismatches and replayed dead letters
+#
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+from weaviate.util import generate_uuid5
+
+import dead_letter
+import movie_loader
+import query_cache
+import sync_manifest
+from dead_letter import DeadLetterQueue, replay_dead_letters
+from sync_manifest import load_manifest, plan_sync, record_stored, save_manifest
+
+
+@pytest.fixture(autouse=True)
+def scratch(tmp_path, monkeypatch):
+    monkeypatch.setattr(sync_manifest, "MANIFEST_DIR", tmp_path / "manifests")
+    monkeypatch.setattr(dead_letter, "DEAD_LETTER_DIR", tmp_path / "dead_letter")
+    monkeypatch.setattr(query_cache, "STAMP_DIR", tmp_path / "query_cache")
+
+
+class FakeCollection:
+    # Stands in for a collection holding the UUIDs in `stored`
+    def __init__(self, stored, undeletable=()):
+        self.stored = set(stored)
+        self.undeletable = set(undeletable)
+        self.inserted = []
+        self.iterated = False
+        self.aggregate = SimpleNamespace(
+            over_all=lambda total_count: SimpleNamespace(total_count=len(self.stored))
+        )
+        self.data = SimpleNamespace(delete_many=self._delete_many, insert_many=self._insert_many)
+
+    def iterator(self, include_vector=False, return_properties=None):
+        assert not include_vector and return_properties == []
+        self.iterated = True
+        return iter([SimpleNamespace(uuid=uuid) for uuid in sorted(self.stored)])
+
+    def _delete_many(self, where, verbose=False):
+        objects = []
+        for uuid in where.value:
+            successful = uuid not in self.undeletable
+            if successful:
+                self.stored.discard(uuid)
+            objects.append(SimpleNamespace(uuid=uuid, successful=successful))
+        failed = sum(not obj.successful for obj in objects)
+        return SimpleNamespace(objects=objects, failed=failed, successful=len(objects) - failed)
+
+    def _insert_many(self, objects):
+        self.inserted += [str(obj.uuid) for obj in objects]
+        self.stored.update(self.inserted)
+        return SimpleNamespace(errors={})
+
+
+@pytest.fixture
+def connect(monkeypatch):
+    def install(collection):
+        client = SimpleNamespace(collections=SimpleNamespace(get=lambda name: collection), close=lambda: None)
+        monkeypatch.setattr(movie_loader.weaviate, "connect_to_local", lambda headers=None: client)
+
+    return install
+
+
+def movies(*tmdb_ids):
+    return pd.DataFrame({
+        "id": list(tmdb_ids),
+        "title": [f"Movie {i}" for i in tmdb_ids],
+        "overview": ["..."] * len(tmdb_ids),
+        "vote_average": [7.0] * len(tmdb_ids),
+        "genre_ids": [[1]] * len(tmdb_ids),
+        "release_date": ["2000-01-01"] * len(tmdb_ids),
+    })
+
+
+def test_matching_collection_deletes_dropped_movies(connect):
+    _, _, manifest = plan_sync(movies(1, 2, 3), {})
+    collection = FakeCollection(manifest)
+    connect(collection)
+
+    current = {generate_uuid5(i) for i in (1, 2)}
+    kept, deleted = movie_loader._sync_collection("Movie", None, manifest, current)
+
+    assert deleted == [generate_uuid5(3)]
+    assert collection.stored == current
+    assert not collection.iterated
+    assert kept == manifest
+
+
+def test_mismatch_rebuilds_the_plan_from_stored_uuids(connect):
+    _, _, manifest = plan_sync(movies(1, 2, 3, 4), {})
+    # Movies 3 and 4 never made it into the collection; movie 9 is stored but not in the manifest
+    collection = FakeCollection([generate_uuid5(i) for i in (1, 2, 9)])
+    connect(collection)
+
+    df = movies(1, 2, 4)
+    current = set(df["id"].map(generate_uuid5))
+    kept, deleted = movie_loader._sync_collection("Movie", None, manifest, current)
+    load_df, _, _ = plan_sync(df, kept)
+
+    assert collection.iterated
+    assert deleted == [generate_uuid5(9)]
+    assert load_df["id"].tolist() == [4]  # Only the missing movie is re-sent
+
+
+def test_failed_deletions_are_not_reported_as_deleted(connect, capsys):
+    _, _, manifest = plan_sync(movies(1, 2), {})
+    collection = FakeCollection(manifest, undeletable=[generate_uuid5(2)])
+    connect(collection)
+
+    _, deleted = movie_loader._sync_collection("Movie", None, manifest, {generate_uuid5(1)})
+
+    assert deleted == []
+    assert generate_uuid5(2) in collection.stored
+    assert "Failed to delete 1 objects" in capsys.readouterr().out
+
+
+def test_record_stored_moves_pending_hashes_into_the_manifest():
+    save_manifest("Movie", {"a": "1"}, {"b": "2", "c": "3"})
+    assert record_stored("Movie", ["b", "x"]) == 1
+    assert load_manifest("Movie") == {"a": "1", "b": "2"}
+    assert sync_manifest._read(sync_manifest.pending_path("Movie")) == {"c": "3"}
+
+
+def test_replayed_dead_letters_are_recorded_in_the_manifest(connect):
+    uuid = generate_uuid5(5)
+    save_manifest("Movie", {}, {uuid: "hash-5"})
+    with DeadLetterQueue("Movie") as queue:
+        queue.write(uuid, {"title": "Movie 5"}, None, "status code: 503", True)
+    collection = FakeCollection([])
+    connect(collection)
+
+    assert replay_dead_letters("Movie") == []
+    assert collection.inserted == [uuid]
+    assert load_manifest("Movie") == {uuid: "hash-5"}